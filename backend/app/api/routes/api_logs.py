@@ -1,10 +1,11 @@
 from typing import Any, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-import math
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, date
 
-from app.db.database import get_db
+from app.db.database import get_async_db
+from app.db.pagination import paginate, InvalidCursorError
 from app.db.models import ApiLogEntry, User
 from app.db.schemas import ApiLog, PaginatedResponse
 from app.core.security import get_current_active_user
@@ -19,41 +20,48 @@ async def get_api_logs(
     success: Optional[bool] = None,
     page: int = Query(1, ge=1),
     per_page: int = Query(50, ge=1, le=100),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+    db: AsyncSession = Depends(get_async_db),
     _: User = Depends(get_current_active_user)
 ) -> Any:
     """
     Получение логов API с фильтрацией и пагинацией
-    """
-    # Базовый запрос
-    query = db.query(ApiLogEntry)
-    
-    # Применяем фильтры
-    if start_date:
-        query = query.filter(ApiLogEntry.timestamp >= datetime.combine(start_date, datetime.min.time()))
-    
-    if end_date:
-        query = query.filter(ApiLogEntry.timestamp <= datetime.combine(end_date, datetime.max.time()))
-    
-    if success is not None:
-        query = query.filter(ApiLogEntry.success == success)
     
-    # Сортировка по времени (сначала новые)
-    query = query.order_by(ApiLogEntry.timestamp.desc())
-    
-    # Получаем общее количество записей
-    total_items = query.count()
-    
-    # Рассчитываем пагинацию
-    total_pages = math.ceil(total_items / per_page)
-    offset = (page - 1) * per_page
+    Для глубоких страниц используйте cursor из next_cursor предыдущего
+    ответа: выборка продолжается по ключу (timestamp, id) без OFFSET.
+    include_total=false отключает подсчет общего количества записей.
+    """
+    def load_page(sync_db: Session) -> dict:
+        # Базовый запрос
+        query = sync_db.query(ApiLogEntry)
+        
+        # Применяем фильтры
+        if start_date:
+            query = query.filter(ApiLogEntry.timestamp >= datetime.combine(start_date, datetime.min.time()))
+        
+        if end_date:
+            query = query.filter(ApiLogEntry.timestamp <= datetime.combine(end_date, datetime.max.time()))
+        
+        if success is not None:
+            query = query.filter(ApiLogEntry.success == success)
+        
+        # Сортировка по времени (сначала новые), id - для однозначного порядка
+        return paginate(
+            query,
+            (ApiLogEntry.timestamp, ApiLogEntry.id),
+            per_page,
+            page=page,
+            cursor=cursor,
+            descending=True,
+            count_key=("api_logs", start_date, end_date, success),
+            include_total=include_total
+        )
     
-    # Получаем записи для текущей страницы
-    items = query.offset(offset).limit(per_page).all()
+    try:
+        result = await db.run_sync(load_page)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     
-    return {
-        "items": items,
-        "total": total_items,
-        "page": page,
-        "pages": total_pages
-    } 
\ No newline at end of file
+    result["items"] = [ApiLog.model_validate(item) for item in result["items"]]
+    return result
@@ -1,17 +1,26 @@
 from typing import Any
 from datetime import timedelta
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+import math
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.security import (
     authenticate_user,
     create_access_token,
     get_current_active_user,
-    get_password_hash
+    get_password_hash_async
+)
+from app.core.login_limiter import (
+    login_client_limiter,
+    login_delay,
+    login_ip_limiter,
+    login_username_limiter
 )
 from app.core.config import settings
-from app.db.database import get_db
+from app.db.database import get_async_db
 from app.db.models import User
 from app.db.schemas import Token, UserCreate, User as UserSchema
 
@@ -20,19 +29,48 @@ router = APIRouter()
 
 @router.post("/login", response_model=Token)
 async def login_access_token(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """
     Получение токена доступа OAuth2 для авторизации
+    
+    Учитываются только неудачные попытки за LOGIN_ATTEMPT_WINDOW секунд.
+    С одного IP под одним именем допускается LOGIN_MAX_FAILED_ATTEMPTS
+    неудачных попыток, дальше возвращается 429 без проверки пароля. Сверх
+    LOGIN_MAX_FAILED_ATTEMPTS_PER_IP с IP или
+    LOGIN_MAX_FAILED_ATTEMPTS_PER_USERNAME под именем ответ задерживается,
+    но верный пароль принимается.
     """
-    user = authenticate_user(db, form_data.username, form_data.password)
+    client_ip = request.client.host if request.client else "unknown"
+    username_key = form_data.username.lower()
+    client_key = f"{client_ip}:{username_key}"
+    
+    retry_after = login_client_limiter.retry_after(client_key)
+    if retry_after > 0:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts, try again later",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+    
+    delay = login_delay(client_ip, username_key)
+    if delay > 0:
+        await asyncio.sleep(delay)
+    
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
+        login_client_limiter.record(client_key)
+        login_ip_limiter.record(client_ip)
+        login_username_limiter.record(username_key)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    login_client_limiter.reset(client_key)
+    
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     return {
         "access_token": create_access_token(
@@ -45,15 +83,17 @@ async def login_access_token(
 @router.post("/register", response_model=UserSchema)
 async def register_user(
     user_in: UserCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """
     Регистрация нового пользователя
     """
     # Проверяем, что пользователь с таким именем или email не существует
-    user_exists = db.query(User).filter(
-        (User.username == user_in.username) | (User.email == user_in.email)
-    ).first()
+    user_exists = (await db.execute(
+        select(User).where(
+            (User.username == user_in.username) | (User.email == user_in.email)
+        )
+    )).scalars().first()
     
     if user_exists:
         raise HTTPException(
@@ -65,14 +105,14 @@ async def register_user(
     user = User(
         username=user_in.username,
         email=user_in.email,
-        hashed_password=get_password_hash(user_in.password),
+        hashed_password=await get_password_hash_async(user_in.password),
         is_active=True,
         is_superuser=False
     )
     
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
     
     return user
 
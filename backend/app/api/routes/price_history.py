@@ -1,12 +1,17 @@
 from typing import Any, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-import math
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, date
 
-from app.db.database import get_db
-from app.db.models import PriceHistory, User
-from app.db.schemas import PriceHistory as PriceHistorySchema, PaginatedResponse
+from app.db.database import get_async_db
+from app.db.pagination import paginate, InvalidCursorError
+from app.db.models import PriceHistory, PriceHistoryDaily, User
+from app.db.schemas import (
+    PriceHistory as PriceHistorySchema,
+    PriceHistoryDaily as PriceHistoryDailySchema,
+    PaginatedResponse
+)
 from app.core.security import get_current_active_user
 
 router = APIRouter()
@@ -19,41 +24,102 @@ async def get_price_history(
     end_date: Optional[date] = None,
     page: int = Query(1, ge=1),
     per_page: int = Query(50, ge=1, le=100),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+    db: AsyncSession = Depends(get_async_db),
     _: User = Depends(get_current_active_user)
 ) -> Any:
     """
     Получение истории изменения цен с фильтрацией и пагинацией
-    """
-    # Базовый запрос
-    query = db.query(PriceHistory)
-    
-    # Применяем фильтры
-    if product_id:
-        query = query.filter(PriceHistory.product_id == product_id)
     
-    if start_date:
-        query = query.filter(PriceHistory.timestamp >= datetime.combine(start_date, datetime.min.time()))
-    
-    if end_date:
-        query = query.filter(PriceHistory.timestamp <= datetime.combine(end_date, datetime.max.time()))
+    Для глубоких страниц используйте cursor из next_cursor предыдущего
+    ответа: выборка продолжается по ключу (timestamp, id) без OFFSET.
+    include_total=false отключает подсчет общего количества записей.
+    """
+    def load_page(sync_db: Session) -> dict:
+        # Базовый запрос
+        query = sync_db.query(PriceHistory)
+        
+        # Применяем фильтры
+        if product_id:
+            query = query.filter(PriceHistory.product_id == product_id)
+        
+        if start_date:
+            query = query.filter(PriceHistory.timestamp >= datetime.combine(start_date, datetime.min.time()))
+        
+        if end_date:
+            query = query.filter(PriceHistory.timestamp <= datetime.combine(end_date, datetime.max.time()))
+        
+        # Сортировка по времени (сначала новые), id - для однозначного порядка
+        return paginate(
+            query,
+            (PriceHistory.timestamp, PriceHistory.id),
+            per_page,
+            page=page,
+            cursor=cursor,
+            descending=True,
+            count_key=("price_history", product_id, start_date, end_date),
+            include_total=include_total
+        )
     
-    # Сортировка по времени (сначала новые)
-    query = query.order_by(PriceHistory.timestamp.desc())
+    try:
+        result = await db.run_sync(load_page)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     
-    # Получаем общее количество записей
-    total_items = query.count()
+    result["items"] = [PriceHistorySchema.model_validate(item) for item in result["items"]]
+    return result
+
+
+@router.get("/daily", response_model=PaginatedResponse)
+async def get_price_history_daily(
+    product_id: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    page: int = Query(1, ge=1),
+    per_page: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+    db: AsyncSession = Depends(get_async_db),
+    _: User = Depends(get_current_active_user)
+) -> Any:
+    """
+    Получение дневных агрегатов истории цен (открытие, закрытие, минимум,
+    максимум и число изменений за день)
     
-    # Рассчитываем пагинацию
-    total_pages = math.ceil(total_items / per_page)
-    offset = (page - 1) * per_page
+    Записи старше PRICE_HISTORY_RETENTION_DAYS дней хранятся только в этом
+    виде, поэтому запросы за длинные периоды выполняются по агрегатам.
+    """
+    def load_page(sync_db: Session) -> dict:
+        # Базовый запрос
+        query = sync_db.query(PriceHistoryDaily)
+        
+        # Применяем фильтры
+        if product_id:
+            query = query.filter(PriceHistoryDaily.product_id == product_id)
+        
+        if start_date:
+            query = query.filter(PriceHistoryDaily.day >= start_date)
+        
+        if end_date:
+            query = query.filter(PriceHistoryDaily.day <= end_date)
+        
+        # Сортировка по дню (сначала новые), id - для однозначного порядка
+        return paginate(
+            query,
+            (PriceHistoryDaily.day, PriceHistoryDaily.id),
+            per_page,
+            page=page,
+            cursor=cursor,
+            descending=True,
+            count_key=("price_history_daily", product_id, start_date, end_date),
+            include_total=include_total
+        )
     
-    # Получаем записи для текущей страницы
-    items = query.offset(offset).limit(per_page).all()
+    try:
+        result = await db.run_sync(load_page)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     
-    return {
-        "items": items,
-        "total": total_items,
-        "page": page,
-        "pages": total_pages
-    } 
\ No newline at end of file
+    result["items"] = [PriceHistoryDailySchema.model_validate(item) for item in result["items"]]
+    return result
@@ -1,12 +1,14 @@
 from typing import Any, List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query, Path, status
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
-import math
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, select
 from datetime import datetime
 import logging
 
-from app.db.database import get_db
+from app.db.database import get_async_db
+from app.db.pagination import paginate, InvalidCursorError
+from app.db.search import product_search_filter
 from app.db.models import SkuMonitoring, User
 from app.db.schemas import (
     Product,
@@ -21,10 +23,12 @@ from app.db.schemas import (
 )
 from app.core.security import get_current_active_user
 from app.services.ozon_api import ozon_api, OzonApiError
-from app.services.front_price_api import front_price_api, FrontPriceApiError
+from app.services.front_price_api import FrontPriceApiError
+from app.services.front_price_cache import front_price_cache, entries_to_products
+from app.services.front_price_ingest import apply_front_prices
 from app.services.price_calculator import calculate_price_adjustment, can_activate_product
 from app.tasks.monitor_products import monitor_products
-from app.tasks.maintain_mrpc_prices import update_product_price
+from app.tasks.maintain_mrpc_prices import update_products_prices
 from app.core.config import settings
 
 router = APIRouter()
@@ -39,46 +43,51 @@ async def get_products(
     active: Optional[bool] = None,
     has_stock: Optional[bool] = None,
     search: Optional[str] = None,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+    db: AsyncSession = Depends(get_async_db),
     _: User = Depends(get_current_active_user)
 ) -> Any:
     """
     Получение списка товаров с пагинацией и фильтрацией
+    
+    Для глубоких страниц используйте cursor из next_cursor предыдущего
+    ответа: выборка продолжается по id без OFFSET. include_total=false
+    отключает подсчет общего количества товаров.
     """
     try:
         logger.info("Получение списка товаров с параметрами: page=%s, per_page=%s, active=%s, has_stock=%s, search=%s",
                    page, per_page, active, has_stock, search)
         
-        # Базовый запрос
-        query = db.query(SkuMonitoring)
-        
-        # Применяем фильтры
-        if active is not None:
-            query = query.filter(SkuMonitoring.active == active)
-        
-        if has_stock is not None:
-            query = query.filter(SkuMonitoring.available == has_stock)
-        
-        if search:
-            query = query.filter(
-                or_(
-                    SkuMonitoring.name.ilike(f"%{search}%"),
-                    SkuMonitoring.sku.ilike(f"%{search}%"),
-                    SkuMonitoring.product_id.ilike(f"%{search}%")
-                )
+        def load_page(sync_db: Session) -> dict:
+            # Базовый запрос
+            query = sync_db.query(SkuMonitoring)
+            
+            # Применяем фильтры
+            if active is not None:
+                query = query.filter(SkuMonitoring.active == active)
+            
+            if has_stock is not None:
+                query = query.filter(SkuMonitoring.available == has_stock)
+            
+            if search:
+                # Название - по индексу FTS5 (префиксы слов), SKU и product_id - по префиксу
+                query = query.filter(product_search_filter(sync_db, search))
+            
+            # Получаем товары для текущей страницы и общее количество (из кэша)
+            return paginate(
+                query,
+                (SkuMonitoring.id,),
+                per_page,
+                page=page,
+                cursor=cursor,
+                count_key=("products", active, has_stock, search),
+                include_total=include_total
             )
         
-        # Получаем общее количество товаров
-        total_items = query.count()
-        logger.debug("Найдено товаров: %s", total_items)
-        
-        # Рассчитываем пагинацию
-        total_pages = math.ceil(total_items / per_page)
-        offset = (page - 1) * per_page
-        
-        # Получаем товары для текущей страницы
-        items = query.offset(offset).limit(per_page).all()
-        logger.debug("Получено товаров для страницы: %s", len(items))
+        result = await db.run_sync(load_page)
+        items = result["items"]
+        logger.debug("Найдено товаров: %s, получено для страницы: %s", result["total"], len(items))
         
         # Преобразуем объекты SQLAlchemy в словари для корректной сериализации
         serialized_items = [
@@ -103,12 +112,9 @@ async def get_products(
             for item in items
         ]
         
-        return {
-            "items": serialized_items,
-            "total": total_items,
-            "page": page,
-            "pages": total_pages
-        }
+        return {**result, "items": serialized_items}
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         logger.error("Ошибка при получении списка товаров: %s", str(e), exc_info=True)
         raise HTTPException(
@@ -140,86 +146,61 @@ async def fetch_products(
 @router.post("/fetch-prices", response_model=dict)
 async def fetch_front_prices(
     request: Optional[UpdatePricesRequest] = None,
-    db: Session = Depends(get_db),
+    refresh: bool = False,
+    db: AsyncSession = Depends(get_async_db),
     _: User = Depends(get_current_active_user)
 ) -> Any:
     """
     Ручное получение цен товаров с витрины Ozon
+    
+    Цены берутся из общего снимка витрины, если он моложе
+    FRONT_PRICE_CACHE_TTL; refresh=true не использует снимок и заново
+    получает цены (и отметки об отсутствии SKU) с витрины.
     """
     try:
-        # Получаем все товары с витрины
-        all_products = await front_price_api.get_all_seller_products(settings.OZON_CLIENT_ID)
-        
-        updated_count = 0
         errors = []
-        current_time = datetime.now()
+        # При refresh подходят только записи, полученные после начала запроса
+        fetched_after = datetime.now() if refresh else None
         
         # Фильтруем товары, если указаны конкретные product_ids
         if request and request.product_ids:
-            # Сначала получаем product_id -> sku маппинг
-            products_map = {
-                p.product_id: p.sku for p in db.query(SkuMonitoring).filter(
+            # Индекс sku -> id только для запрошенных товаров
+            sku_index = {}
+            rows = await db.execute(
+                select(SkuMonitoring.id, SkuMonitoring.sku).where(
                     SkuMonitoring.product_id.in_(request.product_ids)
-                ).all()
-            }
+                ).order_by(SkuMonitoring.id)
+            )
+            for row_id, sku in rows:
+                if sku:
+                    sku_index.setdefault(sku, row_id)
             
-            for product in all_products:
-                sku_id = product.get("sku_id")
-                if not sku_id:
-                    continue
-                
-                # Проверяем, есть ли SKU в нашем списке product_ids
-                in_requested_list = False
-                for product_id, sku in products_map.items():
-                    if sku == sku_id:
-                        in_requested_list = True
-                        break
-                
-                if not in_requested_list:
-                    continue
-                
-                # Обновляем цену
-                price_data = product.get("price", {})
-                card_price = price_data.get("card_price")
-                
-                if not card_price:
-                    errors.append({"sku": sku_id, "error": "No card_price found"})
-                    continue
-                
-                # Находим товар по SKU
-                db_product = db.query(SkuMonitoring).filter(SkuMonitoring.sku == sku_id).first()
-                if db_product:
-                    db_product.front_price = card_price
-                    db_product.front_price_timestamp = current_time
-                    updated_count += 1
-                else:
-                    errors.append({"sku": sku_id, "error": "Product not found in database"})
+            # Свежие цены берутся из общего снимка, а остальные ищутся на витрине
+            # с остановкой обхода, как только найдены все запрошенные SKU
+            fetched_products = entries_to_products(
+                await front_price_cache.get_prices(
+                    settings.OZON_CLIENT_ID, sku_index.keys(), fetched_after=fetched_after
+                )
+            )
+            
+            result = await db.run_sync(apply_front_prices, fetched_products, sku_index=sku_index)
+            errors.extend({"sku": sku, "error": "No card_price found"} for sku in result["no_price"])
+            errors.extend({"sku": sku, "error": "Product not found in database"} for sku in result["missing"])
         else:
-            # Обновляем все товары
-            for product in all_products:
-                sku_id = product.get("sku_id")
-                if not sku_id:
-                    continue
-                
-                price_data = product.get("price", {})
-                card_price = price_data.get("card_price")
-                
-                if not card_price:
-                    continue
-                
-                # Находим товар по SKU
-                db_product = db.query(SkuMonitoring).filter(SkuMonitoring.sku == sku_id).first()
-                if db_product:
-                    db_product.front_price = card_price
-                    db_product.front_price_timestamp = current_time
-                    updated_count += 1
+            # Получаем и обновляем все товары с витрины (refresh - в обход снимка)
+            fetched_products = entries_to_products(
+                await front_price_cache.get_all(settings.OZON_CLIENT_ID, force=refresh)
+            )
+            result = await db.run_sync(apply_front_prices, fetched_products)
         
-        db.commit()
+        updated_count = len(result["updated"])
+        await db.commit()
         
         return {
             "status": "success",
-            "fetched": len(all_products),
+            "fetched": len(fetched_products),
             "updated": updated_count,
+            "unchanged": len(result["unchanged"]),
             "errors": errors
         }
     
@@ -233,7 +214,7 @@ async def fetch_front_prices(
 @router.post("/set-mrpc", response_model=MrpcUpdateBatchResponse)
 async def set_mrpc(
     items: List[MrpcUpdate],
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: User = Depends(get_current_active_user)
 ) -> Any:
     """
@@ -244,7 +225,9 @@ async def set_mrpc(
     
     for item in items:
         # Поиск товара по SKU
-        product = db.query(SkuMonitoring).filter(SkuMonitoring.sku == item.sku).first()
+        product = (await db.execute(
+            select(SkuMonitoring).where(SkuMonitoring.sku == item.sku)
+        )).scalars().first()
         
         if not product:
             errors.append({"sku": item.sku, "error": "Product not found"})
@@ -268,7 +251,7 @@ async def set_mrpc(
         except Exception as e:
             errors.append({"sku": item.sku, "error": str(e)})
     
-    db.commit()
+    await db.commit()
     
     return {
         "status": "success",
@@ -280,7 +263,7 @@ async def set_mrpc(
 @router.post("/set-discount", response_model=DiscountUpdateBatchResponse)
 async def set_discount(
     items: List[DiscountUpdate],
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: User = Depends(get_current_active_user)
 ) -> Any:
     """
@@ -291,7 +274,9 @@ async def set_discount(
     
     for item in items:
         # Поиск товара по SKU
-        product = db.query(SkuMonitoring).filter(SkuMonitoring.sku == item.sku).first()
+        product = (await db.execute(
+            select(SkuMonitoring).where(SkuMonitoring.sku == item.sku)
+        )).scalars().first()
         
         if not product:
             errors.append({"sku": item.sku, "error": "Product not found"})
@@ -327,7 +312,7 @@ async def set_discount(
         except Exception as e:
             errors.append({"sku": item.sku, "error": str(e)})
     
-    db.commit()
+    await db.commit()
     
     return {
         "status": "success",
@@ -339,14 +324,16 @@ async def set_discount(
 @router.post("/{product_id}/activate", response_model=dict)
 async def activate_product(
     product_id: str = Path(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: User = Depends(get_current_active_user)
 ) -> Any:
     """
     Активация мониторинга товара
     """
     # Поиск товара по product_id
-    product = db.query(SkuMonitoring).filter(SkuMonitoring.product_id == product_id).first()
+    product = (await db.execute(
+        select(SkuMonitoring).where(SkuMonitoring.product_id == product_id)
+    )).scalars().first()
     
     if not product:
         raise HTTPException(
@@ -370,7 +357,7 @@ async def activate_product(
     # Активация товара
     product.active = True
     product.update_timestamp = datetime.now()
-    db.commit()
+    await db.commit()
     
     return {
         "status": "success",
@@ -383,14 +370,16 @@ async def activate_product(
 @router.post("/{product_id}/deactivate", response_model=dict)
 async def deactivate_product(
     product_id: str = Path(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: User = Depends(get_current_active_user)
 ) -> Any:
     """
     Деактивация мониторинга товара
     """
     # Поиск товара по product_id
-    product = db.query(SkuMonitoring).filter(SkuMonitoring.product_id == product_id).first()
+    product = (await db.execute(
+        select(SkuMonitoring).where(SkuMonitoring.product_id == product_id)
+    )).scalars().first()
     
     if not product:
         raise HTTPException(
@@ -401,7 +390,7 @@ async def deactivate_product(
     # Деактивация товара
     product.active = False
     product.update_timestamp = datetime.now()
-    db.commit()
+    await db.commit()
     
     return {
         "status": "success",
@@ -415,14 +404,16 @@ async def deactivate_product(
 async def update_product(
     product_update: ProductUpdate,
     product_id: str = Path(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: User = Depends(get_current_active_user)
 ) -> Any:
     """
     Обновление параметров товара
     """
     # Поиск товара по product_id
-    product = db.query(SkuMonitoring).filter(SkuMonitoring.product_id == product_id).first()
+    product = (await db.execute(
+        select(SkuMonitoring).where(SkuMonitoring.product_id == product_id)
+    )).scalars().first()
     
     if not product:
         raise HTTPException(
@@ -465,7 +456,7 @@ async def update_product(
         product.discount = product_update.discount
     
     product.update_timestamp = datetime.now()
-    db.commit()
+    await db.commit()
     
     return {
         "status": "success",
@@ -476,19 +467,15 @@ async def update_product(
 @router.post("/update-prices", response_model=UpdatePricesResponse)
 async def update_prices(
     request: Optional[UpdatePricesRequest] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: User = Depends(get_current_active_user)
 ) -> Any:
     """
     Принудительное обновление цен товаров
     """
     try:
-        price_verification_queue = []
-        updated_count = 0
-        errors = []
-        
         # Получаем список товаров для обновления
-        query = db.query(SkuMonitoring).filter(
+        query = select(SkuMonitoring).where(
             and_(
                 SkuMonitoring.active == True,
                 SkuMonitoring.mrpc > 0,
@@ -498,20 +485,16 @@ async def update_prices(
         
         # Если указаны конкретные product_ids, фильтруем по ним
         if request and request.product_ids:
-            query = query.filter(SkuMonitoring.product_id.in_(request.product_ids))
+            query = query.where(SkuMonitoring.product_id.in_(request.product_ids))
         
-        products = query.all()
+        products = (await db.execute(query)).scalars().all()
         
-        # Обновляем цены товаров
-        for product in products:
-            try:
-                # Обновляем цену
-                if await update_product_price(db, product, price_verification_queue):
-                    updated_count += 1
-            except Exception as e:
-                errors.append({"product_id": product.product_id, "error": str(e)})
+        # Обновляем цены товаров пакетами
+        result = await update_products_prices(db, products)
+        updated_count = result["updated"]
+        errors = result["errors"]
         
-        db.commit()
+        await db.commit()
         
         return {
             "status": "success",
@@ -528,7 +511,6 @@ async def update_prices(
 
 @router.post("/monitor", response_model=dict)
 async def monitor_products_endpoint(
-    db: Session = Depends(get_db),
     _: User = Depends(get_current_active_user)
 ) -> Any:
     """
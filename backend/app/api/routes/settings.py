@@ -9,6 +9,8 @@ from app.db.models import User
 from app.db.schemas import SettingsSchema, SettingsResponse
 from app.core.security import get_current_active_user, get_current_superuser
 from app.core.config import settings
+from app.services.ozon_api import ozon_api
+from app.services.front_price_cache import front_price_cache
 
 router = APIRouter()
 
@@ -32,6 +34,29 @@ async def get_settings(
     }
 
 
+@router.get("/rate-limits", response_model=dict)
+async def get_rate_limits(
+    _: User = Depends(get_current_active_user)
+) -> Any:
+    """
+    Текущие лимиты, фактическая частота запросов и глубина очереди
+    к методам Ozon API
+    """
+    return {
+        "ozon_api": ozon_api.rate_limiter.stats()
+    }
+
+
+@router.get("/front-price-cache", response_model=dict)
+async def get_front_price_cache_stats(
+    _: User = Depends(get_current_active_user)
+) -> Any:
+    """
+    Попадания и промахи общего кэша цен витрины и возраст снимков
+    """
+    return front_price_cache.stats()
+
+
 @router.put("", response_model=dict)
 async def update_settings(
     settings_update: SettingsSchema,
@@ -1,11 +1,13 @@
 from typing import Any
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.security import get_current_active_user
+from app.core.principal_cache import principal_cache
+from app.core.security import get_current_active_user, get_password_hash_async
 from app.db.models import User
-from app.db.database import get_db
-from app.db.schemas import User as UserSchema
+from app.db.database import get_async_db
+from app.db.schemas import User as UserSchema, UserUpdate
 
 router = APIRouter()
 
@@ -23,7 +25,7 @@ async def read_current_user(
 @router.get("/{user_id}", response_model=UserSchema)
 async def read_user(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
@@ -36,11 +38,82 @@ async def read_user(
             detail="Недостаточно прав для выполнения операции",
         )
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Пользователь не найден",
         )
     
-    return user 
\ No newline at end of file
+    return user
+
+
+@router.put("/{user_id}", response_model=UserSchema)
+async def update_user(
+    user_id: int,
+    user_in: UserUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Обновление пользователя
+    
+    Пользователь может менять свои имя, email и пароль; статус активности
+    и права администратора меняет только администратор. Запись пользователя
+    в кэше авторизации сбрасывается, поэтому изменения прав действуют со
+    следующего запроса.
+    """
+    if user_id != current_user.id and not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Недостаточно прав для выполнения операции",
+        )
+    
+    if (user_in.is_active is not None or user_in.is_superuser is not None) and not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Недостаточно прав для изменения статуса пользователя",
+        )
+    
+    user = await db.get(User, user_id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Пользователь не найден",
+        )
+    
+    # Проверяем, что новое имя или email не заняты другим пользователем
+    if user_in.username is not None or user_in.email is not None:
+        conflict = (await db.execute(
+            select(User).where(
+                User.id != user_id,
+                (User.username == user_in.username) | (User.email == user_in.email)
+            )
+        )).scalars().first()
+        if conflict:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Username or email already registered",
+            )
+    
+    previous_username = user.username
+    
+    if user_in.username is not None:
+        user.username = user_in.username
+    if user_in.email is not None:
+        user.email = user_in.email
+    if user_in.password is not None:
+        user.hashed_password = await get_password_hash_async(user_in.password)
+    if user_in.is_active is not None:
+        user.is_active = user_in.is_active
+    if user_in.is_superuser is not None:
+        user.is_superuser = user_in.is_superuser
+    
+    await db.commit()
+    await db.refresh(user)
+    
+    # Токены выданы на имя пользователя: сбрасываем запись и по старому имени
+    principal_cache.invalidate(previous_username)
+    principal_cache.invalidate(user.username)
+    
+    return user
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Dict, Optional
 import os
 from pydantic import field_validator
 from pydantic_settings import BaseSettings
@@ -16,18 +16,91 @@ class Settings(BaseSettings):
     # Настройки базы данных
     DATABASE_URL: str
     
+    # Производственный профиль SQLite (для файловой БД)
+    SQLITE_PRODUCTION_PROFILE: bool = True  # WAL, прагмы и разделение читателей и писателя
+    SQLITE_CACHE_SIZE_KB: int = 65536  # кэш страниц на соединение, в КБ
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024  # отображаемая в память часть файла БД, в байтах
+    SQLITE_BUSY_TIMEOUT: int = 5000  # ожидание блокировки БД, в миллисекундах
+    SQLITE_READER_POOL_SIZE: int = 4  # соединений только для чтения
+    
+    # Пул соединений PostgreSQL (на процесс API, отдельно для синхронного и асинхронного движка)
+    DB_POOL_SIZE: int = 10  # постоянных соединений в пуле
+    DB_MAX_OVERFLOW: int = 20  # дополнительных соединений при пиковой нагрузке
+    DB_POOL_TIMEOUT: float = 30.0  # ожидание свободного соединения, в секундах
+    DB_POOL_RECYCLE: int = 1800  # в секундах, соединения старше пересоздаются
+    DB_POOL_PRE_PING: bool = True  # проверка соединения перед выдачей из пула
+    
     # Настройки безопасности
     SECRET_KEY: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 дней
+    AUTH_PRINCIPAL_CACHE_TTL: float = 60.0  # в секундах, время жизни пользователя в кэше авторизации
+    AUTH_PRINCIPAL_CACHE_SIZE: int = 1024  # пользователей в кэше авторизации
+    PASSWORD_HASH_WORKERS: int = 2  # потоков для хэширования и проверки паролей (bcrypt)
+    PASSWORD_HASH_MAX_CONCURRENCY: int = 8  # операций с паролями одновременно, включая ожидающие свободный поток
+    LOGIN_ATTEMPT_WINDOW: int = 300  # в секундах, окно подсчета попыток входа
+    LOGIN_MAX_FAILED_ATTEMPTS: int = 5  # неудачных попыток с одного IP под одним именем за окно, дальше 429
+    LOGIN_MAX_FAILED_ATTEMPTS_PER_IP: int = 20  # неудачных попыток с одного IP под любыми именами до задержки ответа
+    LOGIN_MAX_FAILED_ATTEMPTS_PER_USERNAME: int = 5  # неудачных попыток под одним именем с любых IP до задержки ответа
+    LOGIN_FAILURE_DELAY: float = 0.5  # в секундах, первая задержка сверх лимита, далее удваивается
+    LOGIN_FAILURE_MAX_DELAY: float = 10.0  # в секундах, наибольшая задержка ответа на попытку входа
     
     # Настройки внешних API
     OZON_CLIENT_ID: str
     OZON_API_KEY: str
     FRONT_PRICE_API_URL: str
+    OZON_PRODUCT_LIST_PAGE_SIZE: int = 1000  # товаров на страницу /v3/product/list
+    OZON_PRICES_BATCH_SIZE: int = 1000  # цен в одном запросе /v1/product/import/prices
+    
+    # Клиентские лимиты Ozon Seller API
+    OZON_RATE_LIMIT_DEFAULT: float = 10.0  # запросов в секунду на метод
+    OZON_RATE_LIMITS: Dict[str, float] = {}  # лимиты по путям, JSON: {"/v1/product/import/prices": 5}
+    OZON_CONCURRENCY_INITIAL: int = 4  # одновременных запросов к методу на старте
+    OZON_CONCURRENCY_MIN: int = 1
+    OZON_CONCURRENCY_MAX: int = 16
+    OZON_RETRY_AFTER_DEFAULT: float = 1.0  # пауза после 429 без Retry-After, в секундах
+    
+    # Повторы запросов к внешним API
+    API_RETRY_ATTEMPTS: int = 3  # попыток на один запрос
+    API_RETRY_BASE_DELAY: float = 0.5  # в секундах, удваивается с каждой попыткой (с джиттером)
+    API_RETRY_MAX_DELAY: float = 10.0  # в секундах
+    API_RETRY_DEADLINE: float = 60.0  # общий бюджет времени на все попытки, в секундах
+    API_CIRCUIT_FAILURE_THRESHOLD: int = 5  # сбоев подряд до размыкания цепи
+    API_CIRCUIT_RESET_TIMEOUT: float = 30.0  # в секундах до пробного запроса
+    
+    # Настройки пула HTTP-соединений к внешним API
+    HTTP_POOL_LIMIT: int = 100  # всего соединений в пуле
+    HTTP_POOL_LIMIT_PER_HOST: int = 20  # соединений на один хост
+    HTTP_KEEPALIVE_TIMEOUT: float = 30.0  # в секундах
+    HTTP_DNS_CACHE_TTL: int = 300  # в секундах
+    HTTP_REQUEST_TIMEOUT: float = 30.0  # в секундах
+    
+    # Настройки обхода страниц витрины
+    FRONT_PRICE_PAGE_CONCURRENCY: int = 5  # страниц одновременно
+    FRONT_PRICE_CONDITIONAL_REQUESTS: bool = True  # ETag / Last-Modified для страниц витрины
+    FRONT_PRICE_PAGE_CACHE_SIZE: int = 1000  # страниц витрины, сохраняемых для условных запросов
+    FRONT_PRICE_CACHE_TTL: float = 300.0  # время жизни снимка цен витрины, в секундах
+    FRONT_PRICE_CACHE_CRAWL_THRESHOLD: int = 10  # с этого числа недостающих SKU вместо точечного поиска выполняется полный обход (0 - отключено)
     
     # Настройки мониторинга
     MONITORING_INTERVAL: int = 30  # в минутах
     PRICE_UPDATE_TIMEOUT: int = 60  # в минутах
+    MONITORING_BATCH_SIZE: int = 50  # товаров в одном запросе /v3/product/info/list
+    MONITORING_WORKERS: int = 4  # параллельных запросов информации о товарах
+    MONITORING_QUEUE_SIZE: int = 8  # партий в очереди между стадиями мониторинга
+    MRPC_SCAN_CHUNK_SIZE: int = 1000  # строк за одну выборку при поддержании МРЦ
+    
+    # Настройки проверки изменений цен
+    VERIFICATION_DELAY: int = 60  # в секундах от отправки цены до первой проверки
+    VERIFICATION_RECHECK_DELAY: int = 60  # в секундах между повторными проверками
+    VERIFICATION_BATCH_SIZE: int = 500  # элементов очереди за одну выборку
+    VERIFICATION_FRONT_PRICE_MAX_AGE: int = 120  # в секундах, более свежая цена витрины из БД проверяется без запроса к витрине
+    
+    # Хранение истории цен
+    PRICE_HISTORY_RETENTION_DAYS: int = 90  # записи старше переносятся в дневные агрегаты
+    PRICE_HISTORY_ROLLUP_INTERVAL: int = 24  # в часах
+    
+    # Настройки пагинации списков
+    PAGINATION_COUNT_CACHE_TTL: float = 30.0  # в секундах, время жизни кэша общего количества записей
     
     # Настройки логирования
     LOG_LEVEL: str = "INFO"
@@ -0,0 +1,86 @@
+from collections import deque
+from typing import Deque, Dict
+import time
+
+from app.core.config import settings
+
+
+class AttemptLimiter:
+    """Ограничение числа попыток по ключу за скользящее окно
+
+    Хранит время попыток за последние window секунд. Ключи, у которых
+    все попытки устарели, удаляются при росте числа ключей выше max_keys.
+    """
+
+    def __init__(self, max_attempts: int, window: float, max_keys: int = 10000):
+        self.max_attempts = max_attempts
+        self.window = window
+        self.max_keys = max_keys
+        self._attempts: Dict[str, Deque[float]] = {}
+
+    def _prune(self, key: str, now: float) -> Deque[float]:
+        attempts = self._attempts.get(key)
+        if attempts is None:
+            return deque()
+        while attempts and now - attempts[0] >= self.window:
+            attempts.popleft()
+        if not attempts:
+            del self._attempts[key]
+        return attempts
+
+    def excess(self, key: str) -> int:
+        """Число попыток за окно сверх max_attempts - 1 (0 - лимит не достигнут)"""
+        return max(0, len(self._prune(key, time.monotonic())) - self.max_attempts + 1)
+
+    def retry_after(self, key: str) -> float:
+        """Сколько секунд ждать до следующей разрешенной попытки (0 - можно сейчас)"""
+        now = time.monotonic()
+        attempts = self._prune(key, now)
+        if len(attempts) < self.max_attempts:
+            return 0.0
+        return attempts[0] + self.window - now
+
+    def record(self, key: str) -> None:
+        now = time.monotonic()
+        if key not in self._attempts and len(self._attempts) >= self.max_keys:
+            for stale_key in list(self._attempts):
+                self._prune(stale_key, now)
+        self._attempts.setdefault(key, deque()).append(now)
+
+    def reset(self, key: str) -> None:
+        self._attempts.pop(key, None)
+
+
+def login_delay(client_ip: str, username_key: str) -> float:
+    """
+    Задержка перед проверкой пароля по числу неудачных попыток входа
+
+    Сверх лимита неудачных попыток с IP или под именем каждая следующая
+    попытка ждет вдвое дольше, но не больше LOGIN_FAILURE_MAX_DELAY.
+    Верный пароль при этом принимается: задержка только замедляет подбор.
+    """
+    excess = max(login_ip_limiter.excess(client_ip), login_username_limiter.excess(username_key))
+    if not excess:
+        return 0.0
+    return min(settings.LOGIN_FAILURE_MAX_DELAY, settings.LOGIN_FAILURE_DELAY * 2 ** (excess - 1))
+
+
+# Неудачные попытки с одного IP под одним именем: сверх лимита вход
+# отклоняется, но только для этой пары, поэтому чужие ошибки не блокируют
+# пользователя
+login_client_limiter = AttemptLimiter(
+    max_attempts=settings.LOGIN_MAX_FAILED_ATTEMPTS,
+    window=settings.LOGIN_ATTEMPT_WINDOW
+)
+
+# Неудачные попытки с одного IP под любыми именами: сверх лимита - задержка
+login_ip_limiter = AttemptLimiter(
+    max_attempts=settings.LOGIN_MAX_FAILED_ATTEMPTS_PER_IP,
+    window=settings.LOGIN_ATTEMPT_WINDOW
+)
+
+# Неудачные попытки под одним именем с любых IP: сверх лимита - задержка
+login_username_limiter = AttemptLimiter(
+    max_attempts=settings.LOGIN_MAX_FAILED_ATTEMPTS_PER_USERNAME,
+    window=settings.LOGIN_ATTEMPT_WINDOW
+)
@@ -0,0 +1,62 @@
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import time
+
+from app.core.config import settings
+from app.db.models import User
+
+
+class PrincipalCache:
+    """Кэш пользователей, найденных по subject токена доступа
+
+    Запись живет ttl секунд, при переполнении вытесняется давно не
+    использованная (LRU). В кэше хранятся отсоединенные от сессии объекты
+    User: их можно читать, но нельзя изменять или добавлять в сессию.
+    Изменения прав пользователя должны сбрасывать его запись через
+    invalidate; в других экземплярах API запись устареет не позже чем
+    через ttl секунд.
+    """
+
+    def __init__(self, ttl: float = 60.0, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, User]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, subject: str) -> Optional[User]:
+        cached = self._entries.get(subject)
+        if cached is None or time.monotonic() - cached[0] > self.ttl:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(subject)
+        self.hits += 1
+        return cached[1]
+
+    def put(self, subject: str, user: User) -> None:
+        self._entries[subject] = (time.monotonic(), user)
+        self._entries.move_to_end(subject)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, subject: Optional[str] = None) -> None:
+        """Сбросить запись пользователя (без subject - весь кэш)"""
+        if subject is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(subject, None)
+
+    def stats(self) -> Dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "ttl": self.ttl
+        }
+
+
+# Общий кэш пользователей для проверки токенов доступа
+principal_cache = PrincipalCache(
+    ttl=settings.AUTH_PRINCIPAL_CACHE_TTL,
+    max_entries=settings.AUTH_PRINCIPAL_CACHE_SIZE
+)
@@ -1,18 +1,33 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Union, Any
+from typing import Callable, Optional, TypeVar, Union, Any
+import asyncio
 import jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
+from app.core.principal_cache import principal_cache
 from app.db.models import User
-from app.db.database import get_db
+from app.db.database import get_async_db_session
 
 # Настройка шифрования паролей
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# Пул потоков для bcrypt: хэширование и проверка пароля занимают сотни
+# миллисекунд и не должны блокировать цикл событий. Семафор ограничивает
+# число операций в работе и в очереди пула
+_password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash"
+)
+_password_semaphore = asyncio.Semaphore(settings.PASSWORD_HASH_MAX_CONCURRENCY)
+
+T = TypeVar("T")
+
 # Настройка OAuth2
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
@@ -27,6 +42,22 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def _run_password_operation(func: Callable[..., T], *args) -> T:
+    """Выполнить операцию с паролем в пуле потоков bcrypt"""
+    async with _password_semaphore:
+        return await asyncio.get_running_loop().run_in_executor(_password_executor, func, *args)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Проверка пароля в пуле потоков, без блокировки цикла событий"""
+    return await _run_password_operation(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Получение хэша пароля в пуле потоков, без блокировки цикла событий"""
+    return await _run_password_operation(get_password_hash, password)
+
+
 # Функции для работы с JWT токенами
 def create_access_token(subject: Union[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     """Создание JWT токена доступа"""
@@ -54,21 +85,24 @@ def decode_access_token(token: str) -> dict:
 
 
 # Функции для работы с пользователями
-def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
+async def authenticate_user(db: AsyncSession, username: str, password: str) -> Optional[User]:
     """Аутентификация пользователя"""
-    user = db.query(User).filter(User.username == username).first()
+    user = (await db.execute(select(User).where(User.username == username))).scalar_one_or_none()
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    if not await verify_password_async(password, user.hashed_password):
         return None
     return user
 
 
 # Зависимость для проверки текущего пользователя
-async def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
-) -> User:
-    """Получение текущего пользователя по токену"""
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
+    """
+    Получение текущего пользователя по токену
+    
+    Пользователь берется из кэша principal_cache по subject токена; к БД
+    запрос выполняется только при промахе кэша.
+    """
     try:
         payload = decode_access_token(token)
         username: str = payload.get("sub")
@@ -85,7 +119,12 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    user = db.query(User).filter(User.username == username).first()
+    user = principal_cache.get(username)
+    if user is not None:
+        return user
+    
+    async with get_async_db_session() as db:
+        user = (await db.execute(select(User).where(User.username == username))).scalar_one_or_none()
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -93,6 +132,7 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    principal_cache.put(username, user)
     return user
 
 
@@ -0,0 +1,230 @@
+from typing import Dict, Iterable, List, Sequence, Tuple
+import csv
+import io
+import logging
+
+from sqlalchemy import Table, insert, literal_column, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from sqlalchemy.util import await_only
+
+from app.db.models import PriceHistory, SkuMonitoring
+
+logger = logging.getLogger(__name__)
+
+# Поля SkuMonitoring, которые приходят из Ozon API при мониторинге.
+# Поля, управляемые пользователем (mrpc, discount, active) и ценой
+# с витрины (front_price, front_price_timestamp), не перезаписываются.
+MONITORED_FIELDS = (
+    "sku",
+    "name",
+    "product_url",
+    "marketing_price",
+    "min_price",
+    "old_price",
+    "price",
+    "available",
+)
+
+
+# Колонки истории цен, записываемые при подтверждении изменений
+PRICE_HISTORY_COLUMNS = (
+    "product_id",
+    "timestamp",
+    "showcase_price",
+    "old_price",
+    "new_price",
+)
+
+
+def _chunks(items: List, size: int) -> Iterable[List]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _upsert_products_postgresql(db: Session, chunk: List[Dict]) -> Tuple[int, int]:
+    """
+    Вставка/обновление части товаров одним INSERT ... ON CONFLICT (PostgreSQL)
+
+    Существующая строка обновляется, только если хотя бы одно поле
+    мониторинга изменилось (IS DISTINCT FROM), поэтому update_timestamp
+    неизмененных товаров не трогается. Вставленные строки отличаются от
+    обновленных по xmax = 0 в RETURNING. Строки части должны иметь
+    одинаковый набор полей.
+
+    Returns:
+        Tuple[inserted, updated]
+    """
+    stmt = pg_insert(SkuMonitoring).values(chunk)
+    fields = [field for field in MONITORED_FIELDS if field in chunk[0]]
+
+    changes = {field: stmt.excluded[field] for field in fields}
+    if "update_timestamp" in chunk[0]:
+        changes["update_timestamp"] = stmt.excluded.update_timestamp
+
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[SkuMonitoring.product_id],
+        set_=changes,
+        where=or_(*(getattr(SkuMonitoring, field).is_distinct_from(stmt.excluded[field]) for field in fields))
+    ).returning(literal_column("xmax = 0"))
+
+    flags = db.execute(stmt).scalars().all()
+    inserted = sum(1 for flag in flags if flag)
+    return inserted, len(flags) - inserted
+
+
+def bulk_upsert_products(db: Session, rows: List[Dict], chunk_size: int = 500) -> Dict[str, int]:
+    """
+    Массовая вставка/обновление товаров SkuMonitoring
+
+    Для каждой части загружает существующие строки одним запросом, новые
+    товары вставляет одним executemany INSERT, измененные обновляет одним
+    executemany UPDATE по первичному ключу. На PostgreSQL часть записывается
+    одним INSERT ... ON CONFLICT (product_id) DO UPDATE. Строки без изменений
+    не трогаются (в том числе update_timestamp). Полнотекстовый индекс
+    названий sku_monitoring_fts (SQLite) обновляется триггерами на вставку и
+    изменение name. Фиксация транзакции остается за вызывающим.
+
+    Args:
+        db: Сессия базы данных
+        rows: Данные товаров в формате модели (см. map_ozon_product_to_model)
+        chunk_size: Количество товаров, обрабатываемых за один запрос
+
+    Returns:
+        Dict со счетчиками: inserted, updated, unchanged
+    """
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+
+    # Повторы product_id внутри одной загрузки схлопываются, последний побеждает
+    unique_rows = list({row["product_id"]: row for row in rows}.values())
+    is_postgresql = db.get_bind().dialect.name == "postgresql"
+
+    for chunk in _chunks(unique_rows, chunk_size):
+        if is_postgresql:
+            inserted, updated = _upsert_products_postgresql(db, chunk)
+            counts["inserted"] += inserted
+            counts["updated"] += updated
+            counts["unchanged"] += len(chunk) - inserted - updated
+            continue
+
+        product_ids = [row["product_id"] for row in chunk]
+        existing = {
+            item.product_id: item
+            for item in db.execute(
+                select(
+                    SkuMonitoring.id,
+                    SkuMonitoring.product_id,
+                    *(getattr(SkuMonitoring, field) for field in MONITORED_FIELDS)
+                ).where(SkuMonitoring.product_id.in_(product_ids))
+            )
+        }
+
+        inserts = []
+        updates = []
+        for row in chunk:
+            current = existing.get(row["product_id"])
+            if current is None:
+                inserts.append(row)
+                continue
+
+            changes = {
+                field: row[field]
+                for field in MONITORED_FIELDS
+                if field in row and getattr(current, field) != row[field]
+            }
+            if not changes:
+                counts["unchanged"] += 1
+                continue
+
+            changes["id"] = current.id
+            if "update_timestamp" in row:
+                changes["update_timestamp"] = row["update_timestamp"]
+            updates.append(changes)
+
+        if inserts:
+            db.execute(insert(SkuMonitoring), inserts)
+            counts["inserted"] += len(inserts)
+
+        # Bulk UPDATE по первичному ключу группирует строки по набору колонок
+        if updates:
+            db.execute(update(SkuMonitoring), updates)
+            counts["updated"] += len(updates)
+
+    logger.debug(
+        f"Bulk upsert: {counts['inserted']} inserted, {counts['updated']} updated, "
+        f"{counts['unchanged']} unchanged"
+    )
+    return counts
+
+
+def copy_rows(connection: Connection, table: Table, columns: Sequence[str], rows: List[Dict]) -> bool:
+    """
+    Загрузить строки в таблицу PostgreSQL командой COPY
+
+    Поддерживаются драйверы psycopg2, psycopg и asyncpg. Данные загружаются
+    в текущей транзакции соединения.
+
+    Returns:
+        True, если строки загружены через COPY; False, если драйвер не
+        поддерживается и вызывающий должен записать строки INSERT
+    """
+    records = [tuple(row.get(column) for column in columns) for row in rows]
+    driver = connection.dialect.driver
+    driver_connection = connection.connection.driver_connection
+    copy_sql = f"COPY {table.name} ({', '.join(columns)}) FROM STDIN"
+
+    if driver == "psycopg2":
+        # NULL в формате CSV - пустое значение без кавычек
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(records)
+        buffer.seek(0)
+        with driver_connection.cursor() as cursor:
+            cursor.copy_expert(f"{copy_sql} WITH (FORMAT csv)", buffer)
+        return True
+
+    if driver == "psycopg":
+        with driver_connection.cursor() as cursor:
+            with cursor.copy(copy_sql) as copy:
+                for record in records:
+                    copy.write_row(record)
+        return True
+
+    # asyncpg выполняет COPY мимо транзакции SQLAlchemy, поэтому загрузка
+    # возможна только внутри уже начатой транзакции соединения
+    if driver == "asyncpg" and driver_connection.is_in_transaction():
+        await_only(driver_connection.copy_records_to_table(
+            table.name,
+            records=records,
+            columns=list(columns),
+            schema_name=table.schema
+        ))
+        return True
+
+    return False
+
+
+def bulk_insert_price_history(db: Session, rows: List[Dict]) -> None:
+    """
+    Массовая запись истории цен
+
+    На PostgreSQL строки загружаются командой COPY, без разбора и выполнения
+    INSERT для каждой строки; на других СУБД - одним executemany INSERT.
+    Фиксация транзакции остается за вызывающим.
+
+    Args:
+        db: Сессия базы данных
+        rows: Записи истории с полями PRICE_HISTORY_COLUMNS
+    """
+    if not rows:
+        return
+
+    statement = insert(PriceHistory)
+    # Соединение писателя: то же, на котором сессия выполняет запись
+    connection = db.connection(bind_arguments={"clause": statement})
+    if connection.dialect.name == "postgresql" and copy_rows(
+        connection, PriceHistory.__table__, PRICE_HISTORY_COLUMNS, rows
+    ):
+        return
+
+    db.execute(statement, rows)
@@ -1,18 +1,189 @@
-from sqlalchemy import create_engine
+from typing import Any, Callable, Dict, Optional, Tuple
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.orm import Session
-from contextlib import contextmanager
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.sql.elements import TextClause
+from contextlib import asynccontextmanager, contextmanager
 
 from app.core.config import settings
 
-# Создание движка SQLAlchemy
-engine = create_engine(
-    settings.DATABASE_URL, connect_args={"check_same_thread": False}
-)
+# Асинхронные драйверы для синхронных URL базы данных
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def make_async_url(database_url: str) -> str:
+    """Заменить драйвер в URL базы данных на асинхронный"""
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for database backend: {backend}")
+    return url.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+def use_sqlite_profile(database_url: str) -> bool:
+    """Применяется ли производственный профиль SQLite к этой БД
+
+    Профиль нужен только файловой БД: у БД в памяти каждое соединение
+    видит свою копию, поэтому разделять читателей и писателя нельзя.
+    """
+    url = make_url(database_url)
+    return (
+        settings.SQLITE_PRODUCTION_PROFILE
+        and url.get_backend_name() == "sqlite"
+        and url.database not in (None, "", ":memory:")
+    )
+
+
+def engine_options(database_url: str) -> Dict[str, Any]:
+    """
+    Параметры движка для СУБД из URL
+
+    Для PostgreSQL задается пул соединений: при нескольких экземплярах API
+    общее число соединений к БД равно (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+    на каждый движок каждого экземпляра.
+    """
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+
+    if backend == "sqlite":
+        # Синхронное соединение pysqlite используется из разных потоков
+        if url.get_driver_name() == "pysqlite":
+            return {"connect_args": {"check_same_thread": False}}
+        return {}
+
+    if backend == "postgresql":
+        return {
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "pool_timeout": settings.DB_POOL_TIMEOUT,
+            "pool_recycle": settings.DB_POOL_RECYCLE,
+            "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        }
+
+    return {}
+
+
+def configure_sqlite_engine(engine: Engine, read_only: bool) -> None:
+    """
+    Настроить каждое новое соединение SQLite движка
+
+    Писатель переводит БД в режим WAL (режим хранится в файле БД), в котором
+    читатели не блокируются записью. Соединения читателей дополнительно
+    запрещают запись (query_only).
+    """
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            if not read_only:
+                cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            # Отрицательный cache_size задается в КБ, а не в страницах
+            cursor.execute(f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KB}")
+            cursor.execute(f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}")
+            cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT}")
+            if read_only:
+                cursor.execute("PRAGMA query_only=ON")
+        finally:
+            cursor.close()
+
+
+def create_engines(
+    database_url: str,
+    create: Callable[..., Any] = create_engine,
+    **kwargs
+) -> Tuple[Any, Optional[Any]]:
+    """
+    Создать движок писателя и, в профиле SQLite, движок читателей
+
+    У писателя одно соединение, поэтому запись через один движок
+    сериализуется очередью пула. Маршруты API и фоновые задачи пишут
+    только через асинхронный движок, чтобы ожидание писателя не
+    блокировало цикл событий. Синхронный движок используется при старте
+    (init_db и миграции), до запуска фоновых задач. Без профиля
+    возвращается один движок для чтения и записи с параметрами
+    engine_options.
+
+    Returns:
+        Tuple[writer, reader]; reader равен None без профиля SQLite
+    """
+    options = {**engine_options(database_url), **kwargs}
+    if not use_sqlite_profile(database_url):
+        return create(database_url, **options), None
+
+    writer = create(database_url, pool_size=1, max_overflow=0, **options)
+    reader = create(database_url, pool_size=settings.SQLITE_READER_POOL_SIZE, **options)
+
+    # У асинхронного движка события соединений вешаются на sync_engine
+    configure_sqlite_engine(getattr(writer, "sync_engine", writer), read_only=False)
+    configure_sqlite_engine(getattr(reader, "sync_engine", reader), read_only=True)
+    return writer, reader
+
+
+class RoutingSession(Session):
+    """
+    Сессия, направляющая чтение к читателям, а запись - к писателю
+
+    INSERT/UPDATE/DELETE, текстовые SQL-запросы и flush выполняются через
+    основной движок сессии (писателя). После первой записи сессия до конца транзакции читает тоже
+    через писателя, чтобы видеть свои незафиксированные изменения. Без
+    движка читателей сессия работает как обычная.
+    """
+
+    def __init__(self, *args, reader_bind: Optional[Engine] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.reader_bind = reader_bind
+        self.use_writer = False
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self.reader_bind is None:
+            return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+
+        if self.use_writer or self._flushing or isinstance(clause, (UpdateBase, TextClause)):
+            self.use_writer = True
+            return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+        return self.reader_bind
+
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _reset_session_routing(session: RoutingSession, transaction) -> None:
+    # Новая транзакция снова читает через читателей
+    if transaction.parent is None:
+        session.use_writer = False
+
+
+# Создание движков SQLAlchemy (писатель и, для SQLite, читатели)
+engine, reader_engine = create_engines(settings.DATABASE_URL)
 
 # Создание сессии
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    bind=engine,
+    class_=RoutingSession,
+    reader_bind=reader_engine
+)
+
+# Асинхронные движки: запросы выполняются без блокировки цикла событий
+async_engine, async_reader_engine = create_engines(
+    make_async_url(settings.DATABASE_URL), create=create_async_engine
+)
+
+# Асинхронная сессия; объекты остаются доступными после commit
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    autoflush=False,
+    expire_on_commit=False,
+    sync_session_class=RoutingSession,
+    reader_bind=async_reader_engine.sync_engine if async_reader_engine is not None else None
+)
 
 # Базовый класс для ORM моделей
 Base = declarative_base()
@@ -34,4 +205,24 @@ def get_db_session():
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+
+# Зависимость для получения асинхронной сессии БД
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+@asynccontextmanager
+async def get_async_db_session():
+    """Асинхронный контекстный менеджер для получения сессии БД"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def dispose_async_engines() -> None:
+    """Закрыть соединения асинхронных движков"""
+    await async_engine.dispose()
+    if async_reader_engine is not None:
+        await async_reader_engine.dispose()
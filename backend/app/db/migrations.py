@@ -0,0 +1,102 @@
+from typing import List, Optional, Tuple
+from datetime import datetime
+import logging
+import pathlib
+import re
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Каталог версионированных SQL-миграций: файлы NNNN_описание.sql
+# применяются по порядку имени, каждый ровно один раз. Файл
+# NNNN_описание.<dialect>.sql (например, .sqlite.sql или .postgresql.sql)
+# применяется только к БД этого диалекта
+MIGRATIONS_DIR = pathlib.Path(__file__).resolve().parents[2] / "migrations" / "versions"
+
+
+_TRIGGER_START = re.compile(r"^CREATE\s+((TEMP|TEMPORARY)\s+)?TRIGGER\b", re.IGNORECASE)
+_TRIGGER_END = re.compile(r"^END\s*;$", re.IGNORECASE)
+
+
+def _split_statements(sql: str) -> List[str]:
+    """
+    Разбить SQL-скрипт на отдельные инструкции
+
+    Инструкция заканчивается строкой, которая оканчивается на «;». Тело
+    CREATE TRIGGER собирается целиком до строки «END;». Строки-комментарии
+    «--» удаляются.
+    """
+    statements = []
+    current: List[str] = []
+    in_trigger = False
+
+    for line in sql.splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith("--"):
+            continue
+
+        if not current and _TRIGGER_START.match(stripped):
+            in_trigger = True
+        current.append(line)
+
+        if stripped.endswith(";") and (not in_trigger or _TRIGGER_END.match(stripped)):
+            statements.append("\n".join(current).strip().rstrip(";"))
+            current = []
+            in_trigger = False
+
+    if current:
+        statements.append("\n".join(current).strip())
+    return statements
+
+
+def _parse_migration_name(path: pathlib.Path) -> Tuple[str, Optional[str]]:
+    """Версия миграции и диалект, для которого она написана (None - для всех)"""
+    parts = path.name[:-len(".sql")].split(".")
+    return parts[0], parts[1] if len(parts) > 1 else None
+
+
+def apply_migrations(engine: Engine, migrations_dir: pathlib.Path = MIGRATIONS_DIR) -> List[str]:
+    """
+    Применить новые миграции схемы БД
+
+    Примененные версии хранятся в таблице schema_migrations. Каждая миграция
+    выполняется в отдельной транзакции вместе с записью своей версии, поэтому
+    при ошибке она будет повторена при следующем запуске целиком. Миграции
+    другого диалекта пропускаются.
+
+    Args:
+        engine: Движок SQLAlchemy
+        migrations_dir: Каталог с SQL-файлами миграций
+
+    Returns:
+        List[str] версии, примененные в этом запуске
+    """
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "version VARCHAR(255) PRIMARY KEY, "
+            "applied_at TIMESTAMP NOT NULL)"
+        ))
+        applied = set(conn.execute(text("SELECT version FROM schema_migrations")).scalars())
+
+    newly_applied = []
+    for path in sorted(migrations_dir.glob("*.sql")):
+        version, dialect = _parse_migration_name(path)
+        if version in applied or (dialect is not None and dialect != engine.dialect.name):
+            continue
+
+        logger.info(f"Applying database migration {version}")
+        with engine.begin() as conn:
+            for statement in _split_statements(path.read_text(encoding="utf-8")):
+                conn.execute(text(statement))
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, applied_at) VALUES (:version, :applied_at)"),
+                {"version": version, "applied_at": datetime.now()}
+            )
+        newly_applied.append(version)
+
+    if newly_applied:
+        logger.info(f"Applied {len(newly_applied)} database migrations")
+    return newly_applied
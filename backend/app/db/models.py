@@ -1,4 +1,6 @@
-from sqlalchemy import Boolean, Column, Float, ForeignKey, Integer, String, DateTime, Text
+from datetime import datetime
+
+from sqlalchemy import Boolean, Column, Date, Float, ForeignKey, Integer, String, DateTime, Text, UniqueConstraint
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 
@@ -26,6 +28,9 @@ class SkuMonitoring(Base):
     front_price_timestamp = Column(DateTime, nullable=True)
     update_timestamp = Column(DateTime, nullable=True)
     
+    # Индексы по active/available/mrpc создаются миграцией
+    # migrations/versions/0001_sku_monitoring_filter_indexes.sql
+    
     price_history = relationship("PriceHistory", back_populates="product", cascade="all, delete-orphan")
 
 
@@ -35,12 +40,52 @@ class PriceHistory(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     product_id = Column(String, ForeignKey("sku_monitoring.product_id"), nullable=False)
-    timestamp = Column(DateTime, default=func.now(), nullable=False)
+    # Время задается на клиенте: timestamp входит в ключ курсора, а значения
+    # func.now() SQLite хранит без долей секунды и в UTC, а не в локальном
+    # времени приложения (см. миграцию 0005_normalize_timestamps.sqlite.sql)
+    timestamp = Column(DateTime, default=datetime.now, nullable=False)
     showcase_price = Column(Float, nullable=True)
     old_price = Column(Float, nullable=True)
     new_price = Column(Float, nullable=True)
     
     product = relationship("SkuMonitoring", back_populates="price_history")
+    
+    # Индекс (product_id, timestamp, id) создается миграцией
+    # migrations/versions/0004_price_history_rollup.sql
+
+
+class PriceHistoryDaily(Base):
+    """Модель дневных агрегатов истории цен
+    
+    Записи истории старше PRICE_HISTORY_RETENTION_DAYS переносятся сюда
+    задачей rollup_price_history: одна строка на товар и день.
+    """
+    __tablename__ = "price_history_daily"
+    __table_args__ = (
+        UniqueConstraint("product_id", "day", name="uq_price_history_daily_product_day"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    product_id = Column(String, ForeignKey("sku_monitoring.product_id"), nullable=False)
+    day = Column(Date, index=True, nullable=False)
+    open_price = Column(Float, nullable=True)  # Первая установленная за день цена
+    close_price = Column(Float, nullable=True)  # Последняя установленная за день цена
+    min_price = Column(Float, nullable=True)
+    max_price = Column(Float, nullable=True)
+    change_count = Column(Integer, default=0, nullable=False)
+
+
+class PriceVerificationQueue(Base):
+    """Модель очереди проверки применения изменений цен"""
+    __tablename__ = "price_verification_queue"
+
+    id = Column(Integer, primary_key=True, index=True)
+    product_id = Column(String, ForeignKey("sku_monitoring.product_id"), index=True, nullable=False)
+    expected_price = Column(Float, nullable=False)
+    update_time = Column(DateTime, nullable=False)  # Время отправки цены в Ozon
+    due_at = Column(DateTime, index=True, nullable=False)  # Время следующей проверки
+    attempts = Column(Integer, default=0, nullable=False)
+    created_at = Column(DateTime, default=func.now(), nullable=False)
 
 
 class ApiLogEntry(Base):
@@ -48,7 +93,8 @@ class ApiLogEntry(Base):
     __tablename__ = "api_log_entry"
 
     id = Column(Integer, primary_key=True, index=True)
-    timestamp = Column(DateTime, default=func.now(), nullable=False)
+    # Время задается на клиенте, как и у PriceHistory.timestamp
+    timestamp = Column(DateTime, default=datetime.now, nullable=False)
     endpoint = Column(String, nullable=False)
     method = Column(String, nullable=False)
     status_code = Column(Integer, nullable=True)
@@ -0,0 +1,194 @@
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+from datetime import date, datetime
+import base64
+import json
+import math
+import time
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query
+
+from app.core.config import settings
+
+
+class InvalidCursorError(ValueError):
+    """Курсор пагинации не удалось разобрать"""
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Упаковать значения ключа последней записи страницы в непрозрачный курсор"""
+    payload = []
+    for value in values:
+        if isinstance(value, datetime):
+            value = {"dt": value.isoformat()}
+        elif isinstance(value, date):
+            value = {"d": value.isoformat()}
+        payload.append(value)
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """Распаковать курсор, созданный encode_cursor
+
+    Raises:
+        InvalidCursorError: если курсор поврежден или не подходит к запросу
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(payload, list) or len(payload) != size:
+            raise InvalidCursorError("Invalid cursor: unexpected key size")
+        values = []
+        for value in payload:
+            if isinstance(value, dict):
+                value = datetime.fromisoformat(value["dt"]) if "dt" in value else date.fromisoformat(value["d"])
+            values.append(value)
+        return values
+    except InvalidCursorError:
+        raise
+    except (ValueError, TypeError, KeyError) as e:
+        raise InvalidCursorError(f"Invalid cursor: {str(e)}")
+
+
+def _next_cursor(items: List[Any], key_columns: Sequence[Any], limit: int) -> Tuple[List[Any], Optional[str]]:
+    """Обрезать выборку из limit + 1 записей и построить курсор следующей страницы"""
+    if len(items) <= limit:
+        return items, None
+    items = items[:limit]
+    return items, encode_cursor([getattr(items[-1], column.key) for column in key_columns])
+
+
+def seek_conditions(key_columns: Sequence[Any], values: Sequence[Any], descending: bool = False) -> List[Any]:
+    """
+    Условия выборки записей, идущих после ключа values в порядке key_columns
+
+    (a, b) > (x, y) раскрывается в a >= x AND (a > x OR (a = x AND b > y));
+    отдельное условие a >= x позволяет начать чтение индекса с нужной позиции.
+    """
+    conditions = []
+    for i, column in enumerate(key_columns):
+        compare = column < values[i] if descending else column > values[i]
+        conditions.append(and_(
+            *(key_columns[j] == values[j] for j in range(i)),
+            compare
+        ))
+    first = key_columns[0]
+    return [first <= values[0] if descending else first >= values[0], or_(*conditions)]
+
+
+def keyset_page(
+    query: Query,
+    key_columns: Sequence[Any],
+    limit: int,
+    cursor: Optional[str] = None,
+    descending: bool = False
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Получить страницу записей по ключу (keyset/seek-пагинация)
+
+    Вместо OFFSET запрос продолжается с позиции после последней записи
+    предыдущей страницы, поэтому стоимость не зависит от глубины страницы.
+    Ключ должен быть уникальным (последняя колонка - первичный ключ).
+
+    Args:
+        query: Запрос с фильтрами, но без сортировки
+        key_columns: Атрибуты модели, составляющие ключ сортировки,
+            например (PriceHistory.timestamp, PriceHistory.id)
+        limit: Размер страницы
+        cursor: Курсор из предыдущей страницы (None - первая страница)
+        descending: Сортировка по убыванию ключа
+
+    Returns:
+        Tuple[items, next_cursor]; next_cursor равен None на последней странице
+
+    Raises:
+        InvalidCursorError: если курсор поврежден
+    """
+    if cursor:
+        values = decode_cursor(cursor, len(key_columns))
+        query = query.filter(*seek_conditions(key_columns, values, descending))
+
+    query = query.order_by(*(column.desc() if descending else column.asc() for column in key_columns))
+    return _next_cursor(query.limit(limit + 1).all(), key_columns, limit)
+
+
+class CountCache:
+    """Кэш точного количества записей для списков с пагинацией
+
+    COUNT(*) по большой таблице стоит как полный проход по ней, поэтому
+    результат для одного и того же набора фильтров переиспользуется
+    в течение ttl секунд.
+    """
+
+    def __init__(self, ttl: float = 30.0, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: Dict[Hashable, Tuple[float, int]] = {}
+
+    def count(self, key: Hashable, query: Query) -> int:
+        now = time.monotonic()
+        cached = self._entries.get(key)
+        if cached is not None and now - cached[0] <= self.ttl:
+            return cached[1]
+
+        total = query.order_by(None).count()
+
+        if len(self._entries) >= self.max_entries:
+            # Удаляем устаревшие записи, а если их нет - самую старую
+            expired = [k for k, (stored_at, _) in self._entries.items() if now - stored_at > self.ttl]
+            for k in expired or [min(self._entries, key=lambda k: self._entries[k][0])]:
+                del self._entries[k]
+
+        self._entries[key] = (now, total)
+        return total
+
+
+# Общий кэш количества записей для списков с пагинацией
+count_cache = CountCache(ttl=settings.PAGINATION_COUNT_CACHE_TTL)
+
+
+def paginate(
+    query: Query,
+    key_columns: Sequence[Any],
+    per_page: int,
+    page: int = 1,
+    cursor: Optional[str] = None,
+    descending: bool = False,
+    count_key: Optional[Hashable] = None,
+    include_total: bool = True
+) -> Dict[str, Any]:
+    """
+    Страница списка в формате PaginatedResponse
+
+    С курсором используется keyset-пагинация (page игнорируется), без
+    курсора - номер страницы, как раньше. В обоих режимах возвращается
+    next_cursor, чтобы клиент мог листать дальше без OFFSET. Общее
+    количество записей считается только при include_total и кэшируется
+    по count_key.
+
+    Raises:
+        InvalidCursorError: если курсор поврежден
+    """
+    if cursor:
+        items, next_cursor = keyset_page(query, key_columns, per_page, cursor, descending)
+        page_number = None
+    else:
+        ordered = query.order_by(*(column.desc() if descending else column.asc() for column in key_columns))
+        items, next_cursor = _next_cursor(
+            ordered.offset((page - 1) * per_page).limit(per_page + 1).all(),
+            key_columns,
+            per_page
+        )
+        page_number = page
+
+    total = None
+    if include_total:
+        total = count_cache.count(count_key, query) if count_key is not None else query.count()
+
+    return {
+        "items": items,
+        "total": total,
+        "page": page_number,
+        "pages": math.ceil(total / per_page) if total is not None else None,
+        "next_cursor": next_cursor
+    }
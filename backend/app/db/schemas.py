@@ -1,5 +1,5 @@
 from typing import List, Optional, Dict, Any
-from datetime import datetime
+from datetime import date, datetime
 from pydantic import BaseModel, Field, validator
 
 
@@ -29,6 +29,7 @@ class UserUpdate(BaseModel):
     email: Optional[str] = None
     password: Optional[str] = None
     is_active: Optional[bool] = None
+    is_superuser: Optional[bool] = None
 
 
 class UserInDB(UserBase):
@@ -158,6 +159,20 @@ class PriceHistory(PriceHistoryBase):
         from_attributes = True
 
 
+class PriceHistoryDaily(BaseModel):
+    id: int
+    product_id: str
+    day: date
+    open_price: Optional[float] = None
+    close_price: Optional[float] = None
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    change_count: int
+
+    class Config:
+        from_attributes = True
+
+
 # Схемы для логов API
 class ApiLogBase(BaseModel):
     endpoint: str
@@ -241,9 +256,10 @@ class SettingsResponse(BaseModel):
 # Схемы для пагинации
 class PaginatedResponse(BaseModel):
     items: List[Any]
-    total: int
-    page: int
-    pages: int
+    total: Optional[int] = None  # None, если общее количество не запрашивалось
+    page: Optional[int] = None  # None при пагинации по курсору
+    pages: Optional[int] = None
+    next_cursor: Optional[str] = None  # курсор следующей страницы, None на последней
 
     class Config:
         from_attributes = True 
\ No newline at end of file
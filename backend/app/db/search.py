@@ -0,0 +1,67 @@
+from typing import List, Optional
+import re
+
+from sqlalchemy import Integer, and_, or_, text
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.db.models import SkuMonitoring
+
+# Слова поискового запроса (буквы и цифры в любом алфавите)
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Подзапрос к полнотекстовому индексу названий (миграция 0003)
+_NAME_FTS_QUERY = text(
+    "SELECT rowid FROM sku_monitoring_fts WHERE sku_monitoring_fts MATCH :match"
+).columns(rowid=Integer)
+
+
+def build_fts_query(term: str) -> Optional[str]:
+    """
+    Построить выражение FTS5 MATCH из пользовательского запроса
+
+    Каждое слово ищется как префикс, все слова должны присутствовать
+    в названии. Символы синтаксиса FTS5 из запроса отбрасываются.
+    """
+    tokens: List[str] = _TOKEN_RE.findall(term)
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def _prefix_range(column, prefix: str) -> ColumnElement:
+    """Условие column LIKE 'prefix%' в виде диапазона, который читается по индексу"""
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return and_(column >= prefix, column < upper)
+
+
+def product_search_filter(db: Session, search: str) -> ColumnElement:
+    """
+    Условие поиска товаров по названию, SKU и product_id
+
+    На SQLite название ищется через индекс FTS5 (префиксы слов), а SKU и
+    product_id - по префиксу через их индексы, поэтому поиск не требует
+    полного прохода по таблице. На других СУБД используется ILIKE.
+    """
+    search = search.strip()
+
+    if db.get_bind().dialect.name != "sqlite":
+        return or_(
+            SkuMonitoring.name.ilike(f"%{search}%"),
+            SkuMonitoring.sku.ilike(f"{search}%"),
+            SkuMonitoring.product_id.ilike(f"{search}%")
+        )
+
+    conditions = []
+    if search:
+        conditions.append(_prefix_range(SkuMonitoring.sku, search))
+        conditions.append(_prefix_range(SkuMonitoring.product_id, search))
+
+    match = build_fts_query(search)
+    if match:
+        conditions.append(SkuMonitoring.id.in_(_NAME_FTS_QUERY.bindparams(match=match)))
+
+    if not conditions:
+        # Пустой запрос ничего не фильтрует
+        return SkuMonitoring.id.is_not(None)
+    return or_(*conditions)
@@ -12,12 +12,15 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
-from app.db.database import Base, engine, SessionLocal
+from app.db.database import Base, engine, SessionLocal, dispose_async_engines
 from app.api.api import api_router
 from app.tasks.monitor_products import monitor_products
 from app.tasks.maintain_mrpc_prices import maintain_mrpc_prices
 from app.tasks.verify_price_changes import verify_price_changes
+from app.tasks.rollup_price_history import rollup_price_history
 from app.db.init_db import init_db
+from app.db.migrations import apply_migrations
+from app.services.http_session import http_session_manager
 
 # Настройка логирования
 logging.basicConfig(
@@ -38,6 +41,9 @@ async def lifespan(app: FastAPI):
     # Инициализация базы данных
     Base.metadata.create_all(bind=engine)
     
+    # Индексы и изменения схемы применяются версионированными миграциями
+    apply_migrations(engine)
+    
     # Инициализация первого пользователя
     db = SessionLocal()
     try:
@@ -67,6 +73,13 @@ async def lifespan(app: FastAPI):
         replace_existing=True,
     )
     
+    scheduler.add_job(
+        rollup_price_history,
+        trigger=IntervalTrigger(hours=settings.PRICE_HISTORY_ROLLUP_INTERVAL),
+        id="rollup_price_history",
+        replace_existing=True,
+    )
+    
     # Запуск планировщика
     scheduler.start()
     logger.info("Scheduler started")
@@ -76,6 +89,12 @@ async def lifespan(app: FastAPI):
     # Остановка планировщика при завершении работы
     scheduler.shutdown()
     logger.info("Scheduler shutdown")
+    
+    # Закрытие пула HTTP-соединений к внешним API
+    await http_session_manager.close()
+    
+    # Закрытие соединений асинхронных движков БД
+    await dispose_async_engines()
 
 
 # Создание приложения FastAPI
@@ -1,47 +1,141 @@
-from typing import Dict, List, Optional, Any
+from typing import Dict, Hashable, Iterable, List, NamedTuple, Optional, Any
+from collections import OrderedDict
 import aiohttp
+import asyncio
 import json
 import logging
 from datetime import datetime
 
 from app.core.config import settings
+from app.services.http_session import http_session_manager
+from app.services.rate_limiter import parse_retry_after
+from app.services.retry import CircuitBreaker, RetryPolicy
 
 logger = logging.getLogger(__name__)
 
 
 class FrontPriceApiError(Exception):
     """Исключение при ошибках в Front Price API"""
-    def __init__(self, message: str, status_code: Optional[int] = None):
+    def __init__(
+        self,
+        message: str,
+        status_code: Optional[int] = None,
+        retry_after: Optional[float] = None
+    ):
         self.message = message
         self.status_code = status_code
+        self.retry_after = retry_after
         super().__init__(self.message)
 
 
+class CachedPage(NamedTuple):
+    """Ответ Front Price API с валидаторами для условного запроса"""
+    etag: Optional[str]
+    last_modified: Optional[str]
+    body: Dict
+
+
 class FrontPriceApi:
     """Клиент для работы с Front Price API"""
     
-    def __init__(self, base_url: str):
+    def __init__(
+        self,
+        base_url: str,
+        page_concurrency: int = 1,
+        retry_policy: Optional[RetryPolicy] = None,
+        conditional_requests: bool = False,
+        page_cache_size: int = 1000
+    ):
         self.base_url = base_url
+        self.page_concurrency = page_concurrency
+        self.retry_policy = retry_policy or RetryPolicy()
+        
+        # Режим дельта-синхронизации: страницы запрашиваются с If-None-Match /
+        # If-Modified-Since, а при ответе 304 используется сохраненный ответ.
+        # Хранится не больше page_cache_size ответов, давно не запрошенные
+        # вытесняются первыми (LRU)
+        self.conditional_requests = conditional_requests
+        self.page_cache_size = page_cache_size
+        self._page_cache: "OrderedDict[Hashable, CachedPage]" = OrderedDict()
+        self.not_modified_count = 0
+    
+    async def _make_request(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[Dict] = None,
+        cache_key: Optional[Hashable] = None
+    ) -> Dict:
+        """Выполнить запрос к Front Price API с повторами по политике retry_policy"""
+        return await self.retry_policy.run(
+            method,
+            endpoint,
+            lambda: self._send_request(method, endpoint, params, cache_key),
+            FrontPriceApiError
+        )
     
-    async def _make_request(self, method: str, endpoint: str, params: Optional[Dict] = None) -> Dict:
-        """Выполнить запрос к Front Price API"""
+    async def _send_request(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[Dict] = None,
+        cache_key: Optional[Hashable] = None
+    ) -> Dict:
+        """Выполнить одну попытку запроса к Front Price API
+        
+        Если передан cache_key, запрос выполняется условно по валидаторам
+        сохраненного ответа, а новый ответ с ETag или Last-Modified
+        сохраняется под этим ключом.
+        """
         url = f"{self.base_url}{endpoint}"
         start_time = datetime.now()
         
+        headers = {}
+        cached = self._page_cache.get(cache_key) if cache_key is not None else None
+        if cached is not None:
+            self._page_cache.move_to_end(cache_key)
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+        
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.request(
-                    method=method,
-                    url=url,
-                    params=params,
-                    timeout=30
-                ) as response:
-                    if response.status != 200:
-                        error_msg = await response.text()
-                        logger.error(f"Front Price API error: {error_msg}, status: {response.status}")
-                        raise FrontPriceApiError(error_msg, response.status)
-                    
-                    return await response.json()
+            session = await http_session_manager.get_session()
+            async with session.request(
+                method=method,
+                url=url,
+                params=params,
+                headers=headers
+            ) as response:
+                if response.status == 304 and cached is not None:
+                    self.not_modified_count += 1
+                    return cached.body
+                
+                if response.status != 200:
+                    error_msg = await response.text()
+                    logger.error(f"Front Price API error: {error_msg}, status: {response.status}")
+                    raise FrontPriceApiError(
+                        error_msg,
+                        response.status,
+                        parse_retry_after(response.headers.get("Retry-After"))
+                    )
+
+                body = await response.json()
+                
+                if cache_key is not None:
+                    etag = response.headers.get("ETag")
+                    last_modified = response.headers.get("Last-Modified")
+                    if etag or last_modified:
+                        self._page_cache[cache_key] = CachedPage(etag, last_modified, body)
+                        self._page_cache.move_to_end(cache_key)
+                        while len(self._page_cache) > self.page_cache_size:
+                            self._page_cache.popitem(last=False)
+                    else:
+                        self._page_cache.pop(cache_key, None)
+                
+                return body
+        except FrontPriceApiError:
+            raise
         except aiohttp.ClientError as e:
             logger.error(f"Front Price API connection error: {str(e)}")
             raise FrontPriceApiError(f"Connection error: {str(e)}")
@@ -60,7 +154,9 @@ class FrontPriceApi:
             page: Номер страницы для пагинации
             
         Returns:
-            Dict с данными о товарах и информацией о пагинации
+            Dict с данными о товарах и информацией о пагинации (в режиме
+            conditional_requests при ответе 304 - сохраненный ответ; его
+            нельзя изменять)
             {
                 "pagination": {
                     "current_page": int,
@@ -86,8 +182,9 @@ class FrontPriceApi:
         """
         endpoint = f"/api/v1/seller/{seller_id}"
         params = {"page": page}
+        cache_key = (seller_id, page) if self.conditional_requests else None
         
-        response = await self._make_request("GET", endpoint, params)
+        response = await self._make_request("GET", endpoint, params, cache_key)
         
         # Проверка формата ответа
         if "products" not in response or "pagination" not in response:
@@ -95,32 +192,134 @@ class FrontPriceApi:
         
         return response
     
-    async def get_all_seller_products(self, seller_id: str) -> List[Dict]:
+    async def get_all_seller_products(
+        self,
+        seller_id: str,
+        concurrency: Optional[int] = None
+    ) -> List[Dict]:
         """Получить все товары продавца с витрины Ozon (с обработкой пагинации)
         
+        Первая страница запрашивается отдельно, чтобы узнать total_pages,
+        остальные загружаются параллельно, не более concurrency страниц
+        одновременно. Неудачная страница повторяется отдельно по политике
+        retry_policy, не перезапуская весь обход. Порядок товаров соответствует порядку страниц.
+        
         Args:
             seller_id: ID продавца на Ozon
+            concurrency: Число одновременно загружаемых страниц
+                (по умолчанию settings.FRONT_PRICE_PAGE_CONCURRENCY)
             
         Returns:
             List[Dict] список всех товаров продавца
         """
+        if concurrency is None:
+            concurrency = self.page_concurrency
+        
+        not_modified_before = self.not_modified_count
+        
         # Получаем первую страницу
         first_page = await self.get_prices(seller_id, 1)
         
         # Извлекаем информацию о товарах и пагинации
-        products = first_page["products"]
+        # Копия списка: сохраненный для условных запросов ответ не изменяется
+        products = list(first_page["products"])
         pagination = first_page["pagination"]
         total_pages = pagination["total_pages"]
         
         # Если есть другие страницы, получаем их
         if total_pages > 1:
-            for page in range(2, total_pages + 1):
-                logger.debug(f"Fetching page {page} of {total_pages} for seller {seller_id}")
-                page_data = await self.get_prices(seller_id, page)
-                products.extend(page_data["products"])
+            semaphore = asyncio.Semaphore(max(1, concurrency))
+            
+            async def fetch_page(page: int) -> List[Dict]:
+                async with semaphore:
+                    logger.debug(f"Fetching page {page} of {total_pages} for seller {seller_id}")
+                    page_data = await self.get_prices(seller_id, page)
+                    return page_data["products"]
+            
+            pages = await asyncio.gather(
+                *(fetch_page(page) for page in range(2, total_pages + 1))
+            )
+            for page_products in pages:
+                products.extend(page_products)
+        
+        if self.conditional_requests:
+            logger.debug(
+                f"Seller {seller_id} crawl: {self.not_modified_count - not_modified_before} "
+                f"of {total_pages} pages not modified"
+            )
         
         return products
-
+    
+    async def find_seller_products(
+        self,
+        seller_id: str,
+        skus: Iterable[str],
+        concurrency: Optional[int] = None
+    ) -> List[Dict]:
+        """Найти на витрине товары продавца с указанными SKU
+        
+        Страницы загружаются окнами по concurrency штук, и обход
+        останавливается, как только все запрошенные SKU найдены, поэтому
+        точечное обновление нескольких товаров не скачивает весь каталог.
+        
+        Args:
+            seller_id: ID продавца на Ozon
+            skus: Искомые SKU
+            concurrency: Число одновременно загружаемых страниц
+            
+        Returns:
+            List[Dict] найденные товары (по одному на SKU)
+        """
+        if concurrency is None:
+            concurrency = self.page_concurrency
+        concurrency = max(1, concurrency)
+        
+        remaining = set(skus)
+        found: List[Dict] = []
+        if not remaining:
+            return found
+        
+        def collect(page_products: List[Dict]) -> None:
+            for product in page_products:
+                sku_id = product.get("sku_id")
+                if sku_id in remaining:
+                    remaining.discard(sku_id)
+                    found.append(product)
+        
+        first_page = await self.get_prices(seller_id, 1)
+        collect(first_page["products"])
+        total_pages = first_page["pagination"]["total_pages"]
+        
+        page = 2
+        while remaining and page <= total_pages:
+            window = range(page, min(page + concurrency, total_pages + 1))
+            pages = await asyncio.gather(
+                *(self.get_prices(seller_id, p) for p in window)
+            )
+            for page_data in pages:
+                collect(page_data["products"])
+            page = window.stop
+        
+        logger.debug(
+            f"Found {len(found)} of {len(found) + len(remaining)} requested SKUs "
+            f"for seller {seller_id} in {min(page - 1, total_pages)} of {total_pages} pages"
+        )
+        return found
 
 # Создание экземпляра клиента Front Price API
-front_price_api = FrontPriceApi(base_url=settings.FRONT_PRICE_API_URL) 
\ No newline at end of file
+front_price_api = FrontPriceApi(
+    base_url=settings.FRONT_PRICE_API_URL,
+    page_concurrency=settings.FRONT_PRICE_PAGE_CONCURRENCY,
+    retry_policy=RetryPolicy(
+        max_attempts=settings.API_RETRY_ATTEMPTS,
+        base_delay=settings.API_RETRY_BASE_DELAY,
+        max_delay=settings.API_RETRY_MAX_DELAY,
+        deadline=settings.API_RETRY_DEADLINE,
+        circuit_breaker=CircuitBreaker(
+            failure_threshold=settings.API_CIRCUIT_FAILURE_THRESHOLD,
+            reset_timeout=settings.API_CIRCUIT_RESET_TIMEOUT
+        )
+    ),
+    conditional_requests=settings.FRONT_PRICE_CONDITIONAL_REQUESTS,
+    page_cache_size=settings.FRONT_PRICE_PAGE_CACHE_SIZE
+) 
\ No newline at end of file
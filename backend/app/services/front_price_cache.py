@@ -0,0 +1,270 @@
+from typing import Dict, Iterable, List, NamedTuple, Optional
+from datetime import datetime, timedelta
+import asyncio
+import logging
+
+from app.services.front_price_api import FrontPriceApi, front_price_api
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class FrontPriceEntry(NamedTuple):
+    """Цена товара на витрине в момент получения"""
+    card_price: Optional[float]
+    original: Optional[float]
+    discount_percent: Optional[float]
+    fetched_at: datetime
+
+
+class FrontPriceSnapshot:
+    """Снимок цен витрины продавца: sku -> FrontPriceEntry
+
+    Хранит только цены, а не полные ответы Front Price API. Полный обход
+    витрины заменяет снимок целиком, а результаты точечного поиска
+    дополняют его отдельными записями со своим временем получения.
+    SKU, которых не нашел поиск по всем страницам, запоминаются в absent
+    со временем начала поиска.
+    """
+
+    def __init__(self):
+        self.prices: Dict[str, FrontPriceEntry] = {}
+        self.absent: Dict[str, datetime] = {}
+        self.crawled_at: Optional[datetime] = None
+
+    def replace(self, products: Iterable[Dict], fetched_at: datetime) -> None:
+        self.prices = {}
+        self.absent = {}
+        self.merge(products, fetched_at)
+        self.crawled_at = fetched_at
+
+    def absent_since(self, sku: str) -> Optional[datetime]:
+        """Время последнего полного прохода по витрине, не нашедшего SKU"""
+        if sku in self.prices:
+            return self.absent.get(sku)
+        checked = [t for t in (self.crawled_at, self.absent.get(sku)) if t is not None]
+        return max(checked) if checked else None
+
+    def merge(self, products: Iterable[Dict], fetched_at: datetime) -> None:
+        for product in products:
+            sku_id = product.get("sku_id")
+            if not sku_id:
+                continue
+            price = product.get("price") or {}
+            self.absent.pop(sku_id, None)
+            self.prices[sku_id] = FrontPriceEntry(
+                card_price=price.get("card_price"),
+                original=price.get("original"),
+                discount_percent=price.get("discount_percent"),
+                fetched_at=fetched_at
+            )
+
+
+def entries_to_products(entries: Dict[str, FrontPriceEntry]) -> List[Dict]:
+    """Преобразовать записи снимка в формат товаров Front Price API
+
+    Время получения цены передается в ключе fetched_at, чтобы при записи
+    в БД сохранялось фактическое время снимка.
+    """
+    return [
+        {
+            "sku_id": sku_id,
+            "fetched_at": entry.fetched_at,
+            "price": {
+                "card_price": entry.card_price,
+                "original": entry.original,
+                "discount_percent": entry.discount_percent
+            }
+        }
+        for sku_id, entry in entries.items()
+    ]
+
+
+class FrontPriceCache:
+    """Общий кэш цен витрины с ограниченным временем жизни
+
+    Задачи мониторинга, проверки цен и ручное обновление цен получают
+    данные витрины через кэш: если снимок моложе ttl секунд, обход витрины
+    не выполняется. Одновременные запросы полного обхода разделяют одну
+    загрузку (single-flight). Текущая загрузка хранится как задача своего
+    цикла событий, поэтому кэш не привязан к одному циклу: вызов из другого
+    цикла просто запускает собственную загрузку.
+
+    Точечный поиск нескольких SKU обычно читает большую часть каталога,
+    поэтому начиная с crawl_threshold недостающих SKU вместо него
+    выполняется общий полный обход (0 - всегда точечный поиск).
+    """
+
+    def __init__(self, api: FrontPriceApi, ttl: float = 300.0, crawl_threshold: int = 0):
+        self.api = api
+        self.ttl = ttl
+        self.crawl_threshold = crawl_threshold
+        self._snapshots: Dict[str, FrontPriceSnapshot] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "shared": 0,
+            "sku_hits": 0,
+            "sku_misses": 0,
+            "sku_absent": 0
+        }
+
+    def _snapshot(self, seller_id: str) -> FrontPriceSnapshot:
+        snapshot = self._snapshots.get(seller_id)
+        if snapshot is None:
+            snapshot = FrontPriceSnapshot()
+            self._snapshots[seller_id] = snapshot
+        return snapshot
+
+    def _is_fresh(self, fetched_at: Optional[datetime], fetched_after: Optional[datetime] = None) -> bool:
+        if fetched_at is None:
+            return False
+        if fetched_after is not None and fetched_at < fetched_after:
+            return False
+        return datetime.now() - fetched_at <= timedelta(seconds=self.ttl)
+
+    async def _crawl(self, seller_id: str) -> Dict[str, FrontPriceEntry]:
+        fetched_at = datetime.now()
+        products = await self.api.get_all_seller_products(seller_id)
+        snapshot = self._snapshot(seller_id)
+        snapshot.replace(products, fetched_at)
+        logger.info(f"Front price snapshot for seller {seller_id} refreshed: {len(snapshot.prices)} SKUs")
+        return snapshot.prices
+
+    async def get_all(self, seller_id: str, force: bool = False) -> Dict[str, FrontPriceEntry]:
+        """Получить все цены витрины продавца
+
+        Args:
+            seller_id: ID продавца на Ozon
+            force: Выполнить обход витрины, даже если снимок свежий
+
+        Returns:
+            Dict sku -> FrontPriceEntry
+
+        Raises:
+            FrontPriceApiError: если витрина недоступна
+        """
+        snapshot = self._snapshot(seller_id)
+        if not force and self._is_fresh(snapshot.crawled_at):
+            self._stats["hits"] += 1
+            return snapshot.prices
+
+        loop = asyncio.get_running_loop()
+        task = self._inflight.get(seller_id)
+        if task is not None and not task.done() and task.get_loop() is loop:
+            # Обход уже выполняется - ждем его результат
+            self._stats["shared"] += 1
+        else:
+            self._stats["misses"] += 1
+            task = loop.create_task(self._crawl(seller_id))
+            self._inflight[seller_id] = task
+
+            def forget(done: asyncio.Task) -> None:
+                if self._inflight.get(seller_id) is done:
+                    del self._inflight[seller_id]
+
+            task.add_done_callback(forget)
+
+        # Отмена одного из ожидающих не прерывает общий обход
+        return await asyncio.shield(task)
+
+    async def get_prices(
+        self,
+        seller_id: str,
+        skus: Iterable[str],
+        fetched_after: Optional[datetime] = None
+    ) -> Dict[str, FrontPriceEntry]:
+        """Получить цены витрины для указанных SKU
+
+        Свежие записи берутся из снимка, остальные SKU ищутся на витрине
+        точечно (обход останавливается, как только все SKU найдены) и
+        добавляются в снимок. SKU, которых не нашел свежий проход по всей
+        витрине (полный обход или поиск) после fetched_after, повторно не
+        ищутся до истечения ttl.
+
+        Args:
+            seller_id: ID продавца на Ozon
+            skus: Нужные SKU
+            fetched_after: Не использовать записи, полученные раньше этого времени
+
+        Returns:
+            Dict sku -> FrontPriceEntry для найденных на витрине SKU
+
+        Raises:
+            FrontPriceApiError: если витрина недоступна
+        """
+        snapshot = self._snapshot(seller_id)
+        result: Dict[str, FrontPriceEntry] = {}
+        missing = set()
+        absent = 0
+
+        for sku in skus:
+            entry = snapshot.prices.get(sku)
+            if entry is not None and self._is_fresh(entry.fetched_at, fetched_after):
+                result[sku] = entry
+            elif self._is_fresh(snapshot.absent_since(sku), fetched_after):
+                # Свежий проход по всей витрине SKU не нашел - на витрине его нет
+                absent += 1
+            else:
+                missing.add(sku)
+
+        self._stats["sku_hits"] += len(result)
+        self._stats["sku_misses"] += len(missing)
+        self._stats["sku_absent"] += absent
+
+        if missing and self.crawl_threshold and len(missing) >= self.crawl_threshold:
+            # Полный обход общий для всех задач и обновляет весь снимок
+            started_at = datetime.now()
+            prices = await self.get_all(seller_id, force=True)
+            for sku in missing:
+                entry = prices.get(sku)
+                # Записи обхода, начатого в этом вызове, подходят при любом ttl
+                if entry is not None and (
+                    entry.fetched_at >= started_at
+                    or self._is_fresh(entry.fetched_at, fetched_after)
+                ):
+                    result[sku] = entry
+        elif missing:
+            fetched_at = datetime.now()
+            products = await self.api.find_seller_products(seller_id, missing)
+            snapshot.merge(products, fetched_at)
+            for sku in missing:
+                entry = snapshot.prices.get(sku)
+                if entry is not None and entry.fetched_at == fetched_at:
+                    result[sku] = entry
+                else:
+                    # Поиск без ошибок проходит все страницы, пока SKU не найден
+                    snapshot.absent[sku] = fetched_at
+
+        return result
+
+    def invalidate(self, seller_id: Optional[str] = None) -> None:
+        """Сбросить снимок продавца (или все снимки)"""
+        if seller_id is None:
+            self._snapshots.clear()
+        else:
+            self._snapshots.pop(seller_id, None)
+
+    def stats(self) -> Dict:
+        """Счетчики попаданий и промахов и состояние снимков"""
+        now = datetime.now()
+        return {
+            **self._stats,
+            "ttl": self.ttl,
+            "sellers": {
+                seller_id: {
+                    "skus": len(snapshot.prices),
+                    "age": round((now - snapshot.crawled_at).total_seconds(), 3) if snapshot.crawled_at else None
+                }
+                for seller_id, snapshot in self._snapshots.items()
+            }
+        }
+
+
+# Создание экземпляра кэша цен витрины
+front_price_cache = FrontPriceCache(
+    front_price_api,
+    ttl=settings.FRONT_PRICE_CACHE_TTL,
+    crawl_threshold=settings.FRONT_PRICE_CACHE_CRAWL_THRESHOLD
+)
@@ -0,0 +1,149 @@
+from typing import Dict, Iterable, List, Optional
+from datetime import datetime
+import logging
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.db.models import SkuMonitoring
+
+logger = logging.getLogger(__name__)
+
+
+def build_sku_index(db: Session) -> Dict[str, int]:
+    """
+    Построить индекс sku -> id по всем товарам в БД одним запросом
+
+    Если один SKU встречается у нескольких товаров, используется товар
+    с наименьшим id.
+    """
+    index: Dict[str, int] = {}
+    rows = db.execute(
+        select(SkuMonitoring.id, SkuMonitoring.sku).order_by(SkuMonitoring.id)
+    )
+    for row_id, sku in rows:
+        if sku:
+            index.setdefault(sku, row_id)
+    return index
+
+
+def load_front_prices(
+    db: Session,
+    ids: Optional[Iterable[int]] = None,
+    chunk_size: int = 500
+) -> Dict[int, float]:
+    """
+    Загрузить сохраненные цены витрины id -> front_price
+
+    Без ids загружаются цены всех товаров одним запросом. Товары без цены
+    в результат не попадают.
+    """
+    if ids is None:
+        rows = db.execute(
+            select(SkuMonitoring.id, SkuMonitoring.front_price).where(
+                SkuMonitoring.front_price.is_not(None)
+            )
+        )
+        return {row_id: front_price for row_id, front_price in rows}
+
+    ids = list(ids)
+    prices: Dict[int, float] = {}
+    for i in range(0, len(ids), chunk_size):
+        rows = db.execute(
+            select(SkuMonitoring.id, SkuMonitoring.front_price).where(
+                SkuMonitoring.id.in_(ids[i:i + chunk_size]),
+                SkuMonitoring.front_price.is_not(None)
+            )
+        )
+        prices.update((row_id, front_price) for row_id, front_price in rows)
+    return prices
+
+
+def apply_front_prices(
+    db: Session,
+    products: Iterable[Dict],
+    sku_index: Optional[Dict[str, int]] = None,
+    timestamp: Optional[datetime] = None,
+    chunk_size: int = 500,
+    skip_unchanged: bool = True
+) -> Dict[str, List]:
+    """
+    Записать цены с витрины в SkuMonitoring
+
+    Товары сопоставляются с БД через индекс sku -> id, а изменения
+    front_price/front_price_timestamp применяются одним executemany UPDATE
+    на каждую часть. Строки, у которых front_price уже совпадает с card_price,
+    не перезаписываются (skip_unchanged), поэтому запуск без изменений цен
+    не выполняет записей в БД. Свежесть таких цен хранится во времени
+    получения записей снимка FrontPriceCache, а не в front_price_timestamp.
+    Фиксация транзакции остается за вызывающим.
+
+    Args:
+        db: Сессия базы данных
+        products: Товары с витрины в формате Front Price API
+        sku_index: Готовый индекс sku -> id (если не передан, строится заново)
+        timestamp: Время получения цен (по умолчанию текущее); товар может
+            передать собственное время в ключе fetched_at
+        chunk_size: Количество строк в одном UPDATE
+        skip_unchanged: Не перезаписывать строки с неизменившейся ценой
+
+    Returns:
+        Dict с результатами:
+        {
+            "updated": List[str],   # SKU, для которых записана цена
+            "missing": List[str],   # SKU с витрины, которых нет в БД
+            "no_price": List[str],  # SKU без card_price
+            "unchanged": List[str]  # SKU, цена которых не изменилась
+        }
+    """
+    current_prices: Dict[int, float] = {}
+    if skip_unchanged:
+        # Для полного индекса цены загружаются одним запросом без фильтра по id
+        current_prices = load_front_prices(db, None if sku_index is None else sku_index.values())
+    if sku_index is None:
+        sku_index = build_sku_index(db)
+    if timestamp is None:
+        timestamp = datetime.now()
+
+    result = {"updated": [], "missing": [], "no_price": [], "unchanged": []}
+    pending = []
+
+    for product in products:
+        sku_id = product.get("sku_id")
+        if not sku_id:
+            continue
+
+        card_price = (product.get("price") or {}).get("card_price")
+        if not card_price:
+            result["no_price"].append(sku_id)
+            continue
+
+        row_id = sku_index.get(sku_id)
+        if row_id is None:
+            result["missing"].append(sku_id)
+            continue
+
+        if row_id in current_prices and abs(current_prices[row_id] - card_price) < 0.01:
+            result["unchanged"].append(sku_id)
+            continue
+
+        pending.append({
+            "id": row_id,
+            "front_price": card_price,
+            "front_price_timestamp": product.get("fetched_at") or timestamp
+        })
+        result["updated"].append(sku_id)
+
+        if len(pending) >= chunk_size:
+            db.execute(update(SkuMonitoring), pending)
+            pending = []
+
+    if pending:
+        db.execute(update(SkuMonitoring), pending)
+
+    logger.debug(
+        f"Front prices applied: {len(result['updated'])} updated, "
+        f"{len(result['unchanged'])} unchanged, {len(result['missing'])} missing in DB, "
+        f"{len(result['no_price'])} without card_price"
+    )
+    return result
@@ -0,0 +1,77 @@
+from typing import Optional
+import asyncio
+import aiohttp
+import logging
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class HttpSessionManager:
+    """Менеджер общего aiohttp-сеанса с долгоживущим пулом соединений
+
+    Все клиенты внешних API получают сеанс через get_session(), поэтому
+    TCP/TLS-соединения переиспользуются между запросами, а не открываются
+    заново на каждый вызов.
+    """
+
+    def __init__(
+        self,
+        limit: int,
+        limit_per_host: int,
+        keepalive_timeout: float,
+        dns_cache_ttl: int,
+        request_timeout: float
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.request_timeout = request_timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._lock = asyncio.Lock()
+
+    def _create_session(self) -> aiohttp.ClientSession:
+        """Создать сеанс с настроенным пулом соединений"""
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=self.dns_cache_ttl,
+            use_dns_cache=True,
+        )
+        timeout = aiohttp.ClientTimeout(total=self.request_timeout)
+        logger.debug(
+            f"Creating HTTP session: limit={self.limit}, limit_per_host={self.limit_per_host}, "
+            f"keepalive={self.keepalive_timeout}s, dns_ttl={self.dns_cache_ttl}s"
+        )
+        return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """Получить общий сеанс, создав его при первом обращении"""
+        if self._session is not None and not self._session.closed:
+            return self._session
+
+        async with self._lock:
+            if self._session is None or self._session.closed:
+                self._session = self._create_session()
+            return self._session
+
+    async def close(self) -> None:
+        """Закрыть сеанс и освободить все соединения пула"""
+        async with self._lock:
+            if self._session is not None and not self._session.closed:
+                await self._session.close()
+                logger.info("HTTP session closed")
+            self._session = None
+
+
+# Общий менеджер сеансов для всех клиентов внешних API
+http_session_manager = HttpSessionManager(
+    limit=settings.HTTP_POOL_LIMIT,
+    limit_per_host=settings.HTTP_POOL_LIMIT_PER_HOST,
+    keepalive_timeout=settings.HTTP_KEEPALIVE_TIMEOUT,
+    dns_cache_ttl=settings.HTTP_DNS_CACHE_TTL,
+    request_timeout=settings.HTTP_REQUEST_TIMEOUT
+)
@@ -1,28 +1,89 @@
-from typing import Dict, List, Optional, Any
+from typing import AsyncIterator, Dict, List, Optional, Any
 import aiohttp
 import json
 import logging
 from datetime import datetime
 
 from app.core.config import settings
+from app.services.http_session import http_session_manager
+from app.services.rate_limiter import EndpointRateLimiter, parse_retry_after
+from app.services.retry import CircuitBreaker, RetryPolicy
 
 logger = logging.getLogger(__name__)
 
+# Методы чтения Ozon API, которые вызываются через POST, но безопасны для повтора.
+# Изменение цен сюда не входит: у Ozon лимит на число изменений цены товара в час.
+OZON_IDEMPOTENT_ENDPOINTS = (
+    "/v3/product/list",
+    "/v3/product/info/list",
+)
+
 
 class OzonApiError(Exception):
     """Исключение при ошибках в Ozon API"""
-    def __init__(self, message: str, status_code: Optional[int] = None):
+    def __init__(
+        self,
+        message: str,
+        status_code: Optional[int] = None,
+        retry_after: Optional[float] = None
+    ):
         self.message = message
         self.status_code = status_code
+        self.retry_after = retry_after
         super().__init__(self.message)
 
 
+class ProductListCheckpoint:
+    """Позиция обхода каталога через /v3/product/list
+    
+    Обновляется после каждой полностью выданной страницы, поэтому прерванный
+    обход можно продолжить с того же last_id. Состояние сериализуется через
+    to_dict/from_dict, если его нужно сохранить между запусками.
+    """
+    
+    def __init__(self, last_id: str = "", fetched: int = 0, completed: bool = False):
+        self.last_id = last_id
+        self.fetched = fetched
+        self.completed = completed
+    
+    def reset(self) -> None:
+        """Начать обход каталога с начала"""
+        self.last_id = ""
+        self.fetched = 0
+        self.completed = False
+    
+    def to_dict(self) -> Dict:
+        return {
+            "last_id": self.last_id,
+            "fetched": self.fetched,
+            "completed": self.completed
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> "ProductListCheckpoint":
+        return cls(
+            last_id=data.get("last_id", ""),
+            fetched=data.get("fetched", 0),
+            completed=data.get("completed", False)
+        )
+
+
 class OzonApi:
     """Клиент для работы с Ozon Seller API"""
     
-    def __init__(self, client_id: str, api_key: str):
+    def __init__(
+        self,
+        client_id: str,
+        api_key: str,
+        product_list_page_size: int = 1000,
+        rate_limiter: Optional[EndpointRateLimiter] = None,
+        retry_policy: Optional[RetryPolicy] = None
+    ):
         self.client_id = client_id
         self.api_key = api_key
+        self.product_list_page_size = product_list_page_size
+        self.rate_limiter = rate_limiter or EndpointRateLimiter(default_rate=10.0)
+        self.retry_policy = retry_policy or RetryPolicy(idempotent_endpoints=OZON_IDEMPOTENT_ENDPOINTS)
         self.base_url = "https://api-seller.ozon.ru"
         self.headers = {
             "Client-Id": client_id,
@@ -31,26 +92,49 @@ class OzonApi:
         }
     
     async def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None) -> Dict:
-        """Выполнить запрос к Ozon API"""
+        """Выполнить запрос к Ozon API с повторами по политике retry_policy"""
+        return await self.retry_policy.run(
+            method,
+            endpoint,
+            lambda: self._send_request(method, endpoint, data),
+            OzonApiError
+        )
+    
+    async def _send_request(self, method: str, endpoint: str, data: Optional[Dict] = None) -> Dict:
+        """Выполнить одну попытку запроса к Ozon API"""
         url = f"{self.base_url}{endpoint}"
         start_time = datetime.now()
+        status = None
+        retry_after = None
+        
+        # Ожидание токена и слота для метода (лимиты Ozon задаются по методам)
+        await self.rate_limiter.acquire(endpoint)
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.request(
-                    method=method,
-                    url=url,
-                    headers=self.headers,
-                    json=data,
-                    timeout=30
-                ) as response:
-                    response_data = await response.json()
-                    if response.status != 200:
-                        error_msg = response_data.get("message", "Unknown error")
-                        logger.error(f"Ozon API error: {error_msg}, status: {response.status}")
-                        raise OzonApiError(error_msg, response.status)
-                    
-                    return response_data
+            session = await http_session_manager.get_session()
+            async with session.request(
+                method=method,
+                url=url,
+                headers=self.headers,
+                json=data
+            ) as response:
+                status = response.status
+                retry_after = response.headers.get("Retry-After")
+                
+                # При ошибках (например, 429 от балансировщика) тело может быть не JSON
+                try:
+                    response_data = await response.json(content_type=None) or {}
+                except ValueError:
+                    response_data = {}
+                
+                if response.status != 200:
+                    error_msg = response_data.get("message", "Unknown error")
+                    logger.error(f"Ozon API error: {error_msg}, status: {response.status}")
+                    raise OzonApiError(error_msg, response.status, parse_retry_after(retry_after))
+
+                return response_data
+        except OzonApiError:
+            raise
         except aiohttp.ClientError as e:
             logger.error(f"Ozon API connection error: {str(e)}")
             raise OzonApiError(f"Connection error: {str(e)}")
@@ -58,6 +142,7 @@ class OzonApi:
             logger.error(f"Unexpected error while calling Ozon API: {str(e)}")
             raise OzonApiError(f"Unexpected error: {str(e)}")
         finally:
+            self.rate_limiter.release(endpoint, status, retry_after)
             elapsed = (datetime.now() - start_time).total_seconds()
             logger.debug(f"Ozon API request to {endpoint} took {elapsed:.2f} seconds")
     
@@ -79,6 +164,61 @@ class OzonApi:
         
         return response["result"]["items"]
     
+    async def iter_product_list(
+        self,
+        page_size: Optional[int] = None,
+        checkpoint: Optional[ProductListCheckpoint] = None
+    ) -> AsyncIterator[Dict]:
+        """Обойти весь каталог продавца, постранично по last_id
+        
+        Товары выдаются по мере получения страниц, так что обработка может
+        начинаться до окончания обхода.
+        
+        Args:
+            page_size: Размер страницы (по умолчанию product_list_page_size, максимум 1000)
+            checkpoint: Позиция обхода. Если передана незавершенная позиция,
+                обход продолжается с её last_id; завершенная позиция сбрасывается
+        """
+        endpoint = "/v3/product/list"
+        if page_size is None:
+            page_size = self.product_list_page_size
+        if checkpoint is None:
+            checkpoint = ProductListCheckpoint()
+        elif checkpoint.completed:
+            checkpoint.reset()
+        elif checkpoint.last_id:
+            logger.info(
+                f"Resuming product list enumeration from last_id={checkpoint.last_id} "
+                f"({checkpoint.fetched} items already fetched)"
+            )
+        
+        while True:
+            payload = {
+                "filter": {
+                    "visibility": "ALL"
+                },
+                "last_id": checkpoint.last_id,
+                "limit": page_size
+            }
+            
+            response = await self._make_request("POST", endpoint, payload)
+            
+            if "result" not in response or "items" not in response["result"]:
+                raise OzonApiError("Invalid response format from Ozon API")
+            
+            items = response["result"]["items"]
+            for item in items:
+                yield item
+            
+            # Позиция сдвигается только после выдачи всей страницы
+            checkpoint.last_id = response["result"].get("last_id") or ""
+            checkpoint.fetched += len(items)
+            
+            if not items or not checkpoint.last_id or len(items) < page_size:
+                checkpoint.completed = True
+                logger.debug(f"Product list enumeration completed: {checkpoint.fetched} items")
+                return
+    
     async def get_product_info(self, product_ids: List[str]) -> List[Dict]:
         """Получить информацию о товарах по их ID"""
         endpoint = "/v3/product/info/list"
@@ -124,5 +264,25 @@ class OzonApi:
 # Создание экземпляра клиента Ozon API
 ozon_api = OzonApi(
     client_id=settings.OZON_CLIENT_ID,
-    api_key=settings.OZON_API_KEY
+    api_key=settings.OZON_API_KEY,
+    product_list_page_size=settings.OZON_PRODUCT_LIST_PAGE_SIZE,
+    rate_limiter=EndpointRateLimiter(
+        default_rate=settings.OZON_RATE_LIMIT_DEFAULT,
+        rates=settings.OZON_RATE_LIMITS,
+        initial_concurrency=settings.OZON_CONCURRENCY_INITIAL,
+        min_concurrency=settings.OZON_CONCURRENCY_MIN,
+        max_concurrency=settings.OZON_CONCURRENCY_MAX,
+        default_retry_after=settings.OZON_RETRY_AFTER_DEFAULT
+    ),
+    retry_policy=RetryPolicy(
+        max_attempts=settings.API_RETRY_ATTEMPTS,
+        base_delay=settings.API_RETRY_BASE_DELAY,
+        max_delay=settings.API_RETRY_MAX_DELAY,
+        deadline=settings.API_RETRY_DEADLINE,
+        idempotent_endpoints=OZON_IDEMPOTENT_ENDPOINTS,
+        circuit_breaker=CircuitBreaker(
+            failure_threshold=settings.API_CIRCUIT_FAILURE_THRESHOLD,
+            reset_timeout=settings.API_CIRCUIT_RESET_TIMEOUT
+        )
+    )
 ) 
\ No newline at end of file
@@ -1,6 +1,8 @@
-from typing import Tuple, Dict, Optional, List
+from typing import Tuple, Dict, Optional, List, Sequence, Union
 import logging
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
 
@@ -103,6 +105,145 @@ def analyze_price_difference(
     }
 
 
+ArrayLike = Union[np.ndarray, Sequence[Optional[float]]]
+
+
+def _to_array(values: ArrayLike) -> np.ndarray:
+    """Преобразовать колонку значений в массив float64 (None -> NaN)"""
+    if isinstance(values, np.ndarray):
+        return values.astype(np.float64, copy=False)
+    return np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+
+
+def calculate_price_adjustment_batch(
+    current_price: ArrayLike,
+    mrpc: ArrayLike,
+    discount: ArrayLike
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Пакетный вариант calculate_price_adjustment для колонок значений
+    
+    Результат поэлементно совпадает со скалярной функцией: цена равна МРЦ,
+    old_price = round(МРЦ / (1 - discount/100)) с тем же округлением до
+    четного и той же защитой коэффициента скидки. Отсутствующие значения
+    (None/NaN) трактуются как незаданные: МРЦ - как 0, скидка - как 0.
+    
+    Args:
+        current_price: Текущие цены товаров
+        mrpc: МРЦ товаров
+        discount: Проценты скидки (0-100)
+    
+    Returns:
+        Tuple[new_price, new_old_price] - массивы float64
+    """
+    current_price = _to_array(current_price)
+    mrpc = np.nan_to_num(_to_array(mrpc), nan=0.0)
+    discount = np.nan_to_num(_to_array(discount), nan=0.0)
+    
+    has_mrpc = mrpc > 0
+    has_discount = (discount > 0) & (discount < 100)
+    
+    discount_factor = 1 - (discount / 100)
+    discount_factor = np.where(discount_factor <= 0, 0.1, discount_factor)
+    
+    # np.round, как и round, округляет половины до четного
+    discounted_old_price = np.round(mrpc / np.where(has_discount, discount_factor, 1.0))
+    
+    new_price = np.where(has_mrpc, mrpc, current_price)
+    new_old_price = np.where(
+        has_mrpc,
+        np.where(has_discount, discounted_old_price, mrpc),
+        current_price
+    )
+    return new_price, new_old_price
+
+
+def analyze_price_difference_batch(
+    front_price: ArrayLike,
+    target_price: ArrayLike,
+    threshold_percent: float = 1.0
+) -> Dict[str, np.ndarray]:
+    """
+    Пакетный вариант analyze_price_difference для колонок значений
+    
+    Отсутствующие значения (None/NaN) обрабатываются как неположительные.
+    
+    Returns:
+        Dict с массивами тех же ключей, что и у analyze_price_difference:
+        needs_update, difference, difference_percent, threshold_exceeded
+    """
+    front_price = _to_array(front_price)
+    target_price = _to_array(target_price)
+    
+    valid = (front_price > 0) & (target_price > 0)
+    safe_target = np.where(valid, target_price, 1.0)
+    
+    difference = np.where(valid, front_price - safe_target, 0.0)
+    difference_percent = np.where(valid, (difference / safe_target) * 100, 0.0)
+    threshold_exceeded = ~valid | (np.abs(difference_percent) > threshold_percent)
+    
+    return {
+        "needs_update": threshold_exceeded,
+        "difference": difference,
+        "difference_percent": difference_percent,
+        "threshold_exceeded": threshold_exceeded
+    }
+
+
+def calculate_prices_batch(
+    price: ArrayLike,
+    old_price: ArrayLike,
+    front_price: ArrayLike,
+    mrpc: ArrayLike,
+    discount: ArrayLike,
+    threshold_percent: float = 1.0
+) -> Dict[str, np.ndarray]:
+    """
+    Расчет цен для набора товаров за один проход по колонкам
+    
+    Объединяет analyze_price_difference_batch и calculate_price_adjustment_batch
+    и дополнительно отмечает товары, у которых рассчитанные цены отличаются
+    от текущих (с той же точностью 0.01, что и при поштучной проверке).
+    
+    Args:
+        price: Текущие цены товаров
+        old_price: Текущие old_price (None/NaN трактуется как 0)
+        front_price: Цены на витрине
+        mrpc: МРЦ товаров
+        discount: Проценты скидки (0-100)
+        threshold_percent: Порог отклонения цены на витрине от МРЦ в процентах
+    
+    Returns:
+        Dict с массивами:
+        {
+            "new_price": np.ndarray,           # Новая цена
+            "new_old_price": np.ndarray,       # Новая old_price
+            "needs_update": np.ndarray,        # Отклонение от МРЦ превышает порог
+            "difference": np.ndarray,          # Абсолютная разница с МРЦ
+            "difference_percent": np.ndarray,  # Разница в процентах
+            "price_changed": np.ndarray        # Рассчитанные цены отличаются от текущих
+        }
+    """
+    price = _to_array(price)
+    old_price = np.nan_to_num(_to_array(old_price), nan=0.0)
+    
+    analysis = analyze_price_difference_batch(front_price, mrpc, threshold_percent)
+    new_price, new_old_price = calculate_price_adjustment_batch(price, mrpc, discount)
+    
+    price_changed = ~(
+        (np.abs(price - new_price) < 0.01) & (np.abs(old_price - new_old_price) < 0.01)
+    )
+    
+    return {
+        "new_price": new_price,
+        "new_old_price": new_old_price,
+        "needs_update": analysis["needs_update"],
+        "difference": analysis["difference"],
+        "difference_percent": analysis["difference_percent"],
+        "price_changed": price_changed
+    }
+
+
 def can_activate_product(
     available: bool,
     mrpc: Optional[float],
@@ -0,0 +1,103 @@
+from typing import Dict, List, Optional
+import logging
+
+from app.services.ozon_api import OzonApi, OzonApiError
+
+logger = logging.getLogger(__name__)
+
+# Максимальное количество цен в одном запросе /v1/product/import/prices
+OZON_PRICES_BATCH_LIMIT = 1000
+
+
+class PriceSubmitter:
+    """Накопитель изменений цен для пакетной отправки в Ozon API
+
+    Изменения добавляются через add(), а submit() отправляет их частями
+    не больше batch_size и разбирает поэлементный ответ Ozon
+    (result[].updated / result[].errors), чтобы вызывающий код мог
+    зафиксировать только подтвержденные изменения.
+    """
+
+    def __init__(self, api: OzonApi, batch_size: int = OZON_PRICES_BATCH_LIMIT):
+        self.api = api
+        self.batch_size = max(1, min(batch_size, OZON_PRICES_BATCH_LIMIT))
+        self._pending: List[Dict] = []
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(
+        self,
+        product_id: str,
+        price: float,
+        old_price: float,
+        min_price: Optional[float] = None,
+        **context
+    ) -> None:
+        """Добавить изменение цены в очередь отправки
+
+        Args:
+            product_id: ID товара
+            price: Новая цена
+            old_price: Новая старая цена (для отображения скидки)
+            min_price: Минимальная цена (по умолчанию равна price)
+            **context: Дополнительные данные, которые вернутся вместе с результатом
+        """
+        self._pending.append({
+            **context,
+            "product_id": product_id,
+            "price": price,
+            "old_price": old_price,
+            "min_price": price if min_price is None else min_price
+        })
+
+    @staticmethod
+    def _format_errors(errors: List[Dict]) -> str:
+        return "; ".join(
+            f"{error.get('code', '')}: {error.get('message', '')}".strip(": ")
+            for error in errors
+        ) or "Price was not updated"
+
+    async def submit(self) -> Dict[str, List[Dict]]:
+        """Отправить накопленные изменения цен
+
+        Returns:
+            Dict с результатами:
+            {
+                "confirmed": List[Dict],  # изменения, подтвержденные Ozon (updated = true)
+                "failed": List[Dict]      # изменения с ошибкой, с ключом "error"
+            }
+        """
+        pending, self._pending = self._pending, []
+        confirmed: List[Dict] = []
+        failed: List[Dict] = []
+
+        for i in range(0, len(pending), self.batch_size):
+            chunk = pending[i:i + self.batch_size]
+
+            try:
+                response = await self.api.set_product_prices(chunk)
+            except OzonApiError as e:
+                logger.error(f"Error submitting {len(chunk)} prices: {str(e)}")
+                failed.extend({**item, "error": str(e)} for item in chunk)
+                continue
+
+            results = {
+                str(result.get("product_id")): result
+                for result in response.get("result", [])
+            }
+
+            for item in chunk:
+                result = results.get(str(item["product_id"]))
+                if result is None:
+                    failed.append({**item, "error": "No result returned by Ozon API"})
+                elif result.get("updated"):
+                    confirmed.append(item)
+                else:
+                    failed.append({**item, "error": self._format_errors(result.get("errors") or [])})
+
+        logger.info(
+            f"Submitted {len(pending)} prices in {(len(pending) + self.batch_size - 1) // self.batch_size} "
+            f"requests: {len(confirmed)} confirmed, {len(failed)} failed"
+        )
+        return {"confirmed": confirmed, "failed": failed}
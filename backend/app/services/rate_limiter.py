@@ -0,0 +1,267 @@
+from typing import Deque, Dict, Optional
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Статусы ответа, означающие перегрузку на стороне API
+THROTTLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Разобрать заголовок Retry-After (секунды или HTTP-дата) в секунды ожидания"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class TokenBucket:
+    """Ограничитель частоты запросов по алгоритму token bucket
+
+    Работает на резервировании: каждый вызов сразу забирает токен (баланс
+    может уйти в минус) и ждет, пока токен будет «накоплен». Поэтому
+    ожидающие обслуживаются в порядке очереди без отдельной блокировки.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.waiting = 0
+        self.paused_until = 0.0
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        if now > self._updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    def pause(self, seconds: float) -> None:
+        """Приостановить выдачу токенов (например, по Retry-After)"""
+        now = time.monotonic()
+        self._refill(now)
+        self.paused_until = max(self.paused_until, now + seconds)
+        self.tokens = min(self.tokens, 0.0)
+
+    async def acquire(self) -> None:
+        """Дождаться разрешения на один запрос"""
+        now = time.monotonic()
+        self._refill(now)
+        self.tokens -= 1
+        delay = max(-self.tokens / self.rate if self.tokens < 0 else 0.0, self.paused_until - now)
+        if delay <= 0:
+            return
+
+        self.waiting += 1
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            self.waiting -= 1
+
+
+class AdaptiveConcurrencyLimiter:
+    """Ограничение числа одновременных запросов по схеме AIMD
+
+    После каждого успешного ответа лимит растет на 1/limit (примерно +1 за
+    «окно» запросов), при перегрузке (429/5xx) умножается на decrease_factor,
+    но не чаще одного раза за decrease_interval секунд.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        minimum: int = 1,
+        maximum: int = 32,
+        decrease_factor: float = 0.5,
+        decrease_interval: float = 1.0
+    ):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.decrease_factor = decrease_factor
+        self.decrease_interval = decrease_interval
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for waiter in self._waiters if not waiter.done())
+
+    async def acquire(self) -> None:
+        """Занять слот для запроса, дождавшись освобождения при необходимости"""
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Слот уже был передан этому ожидающему
+                self.release()
+            else:
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+            raise
+
+    def release(self, success: Optional[bool] = None) -> None:
+        """Освободить слот и скорректировать лимит
+
+        Args:
+            success: True - успешный ответ, False - признак перегрузки,
+                None - ответ не влияет на лимит
+        """
+        self.in_flight -= 1
+
+        if success is True:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+        elif success is False:
+            now = time.monotonic()
+            if now - self._last_decrease >= self.decrease_interval:
+                self.limit = max(self.minimum, self.limit * self.decrease_factor)
+                self._last_decrease = now
+
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            self.in_flight += 1
+            waiter.set_result(None)
+
+
+class _EndpointState:
+    """Состояние ограничителя для одного метода API"""
+
+    def __init__(self, rate: float, concurrency: AdaptiveConcurrencyLimiter):
+        self.bucket = TokenBucket(rate)
+        self.concurrency = concurrency
+        self.requests: Deque[float] = deque()
+        self.throttled = 0
+
+
+class EndpointRateLimiter:
+    """Клиентский ограничитель запросов с состоянием по пути метода API
+
+    Для каждого пути заводится свой token bucket (частота из rates или
+    default_rate) и свой AIMD-ограничитель одновременных запросов.
+    """
+
+    # Окно для расчета фактической частоты запросов, в секундах
+    STATS_WINDOW = 60.0
+
+    def __init__(
+        self,
+        default_rate: float,
+        rates: Optional[Dict[str, float]] = None,
+        initial_concurrency: int = 4,
+        min_concurrency: int = 1,
+        max_concurrency: int = 16,
+        default_retry_after: float = 1.0
+    ):
+        self.default_rate = default_rate
+        self.rates = rates or {}
+        self.initial_concurrency = initial_concurrency
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.default_retry_after = default_retry_after
+        self._endpoints: Dict[str, _EndpointState] = {}
+
+    def _state(self, endpoint: str) -> _EndpointState:
+        state = self._endpoints.get(endpoint)
+        if state is None:
+            state = _EndpointState(
+                rate=self.rates.get(endpoint, self.default_rate),
+                concurrency=AdaptiveConcurrencyLimiter(
+                    initial=self.initial_concurrency,
+                    minimum=self.min_concurrency,
+                    maximum=self.max_concurrency
+                )
+            )
+            self._endpoints[endpoint] = state
+        return state
+
+    def _prune(self, state: _EndpointState, now: float) -> None:
+        # В очереди остаются только отметки запросов за окно статистики
+        while state.requests and now - state.requests[0] > self.STATS_WINDOW:
+            state.requests.popleft()
+
+    async def acquire(self, endpoint: str) -> None:
+        """Дождаться слота и токена для запроса к методу"""
+        state = self._state(endpoint)
+        await state.concurrency.acquire()
+        try:
+            await state.bucket.acquire()
+        except BaseException:
+            state.concurrency.release()
+            raise
+        now = time.monotonic()
+        self._prune(state, now)
+        state.requests.append(now)
+
+    def release(
+        self,
+        endpoint: str,
+        status: Optional[int] = None,
+        retry_after: Optional[str] = None
+    ) -> None:
+        """Освободить слот с учетом результата запроса
+
+        Args:
+            endpoint: Путь метода API
+            status: HTTP-статус ответа (None, если ответ не получен)
+            retry_after: Значение заголовка Retry-After
+        """
+        state = self._state(endpoint)
+
+        if status in THROTTLE_STATUSES:
+            state.throttled += 1
+            delay = parse_retry_after(retry_after)
+            if delay is None and status == 429:
+                delay = self.default_retry_after
+            if delay:
+                logger.warning(f"Ozon API throttled {endpoint} (status {status}), pausing for {delay:.1f}s")
+                state.bucket.pause(delay)
+            state.concurrency.release(success=False)
+        elif status is not None and status < 400:
+            state.concurrency.release(success=True)
+        else:
+            state.concurrency.release()
+
+    def stats(self) -> Dict[str, Dict]:
+        """Текущие лимиты, фактическая частота и глубина очереди по методам"""
+        now = time.monotonic()
+        result = {}
+        for endpoint, state in self._endpoints.items():
+            self._prune(state, now)
+            result[endpoint] = {
+                "rate_limit": state.bucket.rate,
+                "current_rate": round(len(state.requests) / self.STATS_WINDOW, 3),
+                "concurrency_limit": int(state.concurrency.limit),
+                "in_flight": state.concurrency.in_flight,
+                "queue_depth": state.concurrency.waiting + state.bucket.waiting,
+                "throttled": state.throttled,
+                "paused_for": round(max(0.0, state.bucket.paused_until - now), 3)
+            }
+        return result
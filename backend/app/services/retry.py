@@ -0,0 +1,179 @@
+from typing import Awaitable, Callable, Iterable, Optional, Type, TypeVar
+import asyncio
+import logging
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Статусы, при которых запрос имеет смысл повторить
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CircuitBreaker:
+    """Размыкатель цепи для внешнего API
+
+    После failure_threshold подряд идущих сбоев (ошибки соединения, 5xx)
+    цепь размыкается, и запросы сразу завершаются ошибкой. Через
+    reset_timeout секунд пропускается один пробный запрос: при успехе
+    цепь замыкается, при сбое снова размыкается. Если исход пробного
+    запроса так и не записан, через reset_timeout пропускается новый.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.state = self.CLOSED
+        self._opened_at = 0.0
+        self._trial_started_at = 0.0
+
+    def allow_request(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        now = time.monotonic()
+        if self.state == self.OPEN and now - self._opened_at >= self.reset_timeout:
+            # Пропускаем один пробный запрос
+            self.state = self.HALF_OPEN
+            self._trial_started_at = now
+            return True
+        if self.state == self.HALF_OPEN and now - self._trial_started_at >= self.reset_timeout:
+            # Исход прошлого пробного запроса потерян, пропускаем новый
+            self._trial_started_at = now
+            return True
+        return False
+
+    def abandon_trial(self) -> None:
+        """Пробный запрос прерван без ответа API: вернуть цепь в OPEN
+
+        Время размыкания не обновляется, поэтому следующий запрос снова
+        станет пробным.
+        """
+        if self.state == self.HALF_OPEN:
+            self.state = self.OPEN
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.state = self.CLOSED
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(f"Circuit breaker opened after {self.failures} consecutive failures")
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+
+
+class RetryPolicy:
+    """Политика повторов запросов к внешнему API
+
+    - повторяются только временные сбои: ошибки соединения и статусы
+      из RETRY_STATUSES;
+    - неидемпотентные методы повторяются только при 429, когда запрос
+      заведомо не был обработан;
+    - задержка растет экспоненциально с полным джиттером, но не меньше
+      Retry-After;
+    - общее время всех попыток ограничено deadline секундами;
+    - сбои учитываются размыкателем цепи.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 10.0,
+        deadline: float = 60.0,
+        idempotent_endpoints: Optional[Iterable[str]] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None
+    ):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.idempotent_endpoints = set(idempotent_endpoints or [])
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+
+    def is_idempotent(self, method: str, endpoint: str) -> bool:
+        """GET всегда идемпотентен, остальные методы - только из списка"""
+        return method.upper() == "GET" or endpoint in self.idempotent_endpoints
+
+    def is_retryable(self, method: str, endpoint: str, status_code: Optional[int]) -> bool:
+        if status_code == 429:
+            return True
+        if not self.is_idempotent(method, endpoint):
+            return False
+        return status_code is None or status_code in RETRY_STATUSES
+
+    def backoff(self, attempt: int) -> float:
+        """Задержка перед попыткой attempt + 1 (full jitter)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    async def run(
+        self,
+        method: str,
+        endpoint: str,
+        operation: Callable[[], Awaitable[T]],
+        error_cls: Type[Exception]
+    ) -> T:
+        """Выполнить запрос с повторами
+
+        Args:
+            method: HTTP-метод запроса
+            endpoint: Путь метода API
+            operation: Функция, выполняющая одну попытку запроса
+            error_cls: Класс ошибки клиента (с атрибутами status_code и retry_after)
+        """
+        started = time.monotonic()
+        attempt = 0
+
+        while True:
+            if not self.circuit_breaker.allow_request():
+                raise error_cls(f"Circuit breaker is open, request to {endpoint} skipped", 503)
+
+            trial = self.circuit_breaker.state == CircuitBreaker.HALF_OPEN
+            attempt += 1
+            recorded = False
+            try:
+                result = await operation()
+                recorded = True
+            except error_cls as e:
+                recorded = True
+                status_code = getattr(e, "status_code", None)
+
+                # Размыкатель учитывает только недоступность API (соединение, 5xx);
+                # ответ 4xx означает, что API доступен
+                if status_code is None or status_code >= 500:
+                    self.circuit_breaker.record_failure()
+                else:
+                    self.circuit_breaker.record_success()
+
+                if attempt >= self.max_attempts or not self.is_retryable(method, endpoint, status_code):
+                    raise
+
+                delay = max(self.backoff(attempt), getattr(e, "retry_after", None) or 0.0)
+                remaining = self.deadline - (time.monotonic() - started)
+                if delay >= remaining:
+                    logger.warning(f"Retry deadline exhausted for {endpoint} after {attempt} attempts")
+                    raise
+
+                logger.warning(
+                    f"Request to {endpoint} failed (attempt {attempt} of {self.max_attempts}): "
+                    f"{str(e)}, retrying in {delay:.2f}s"
+                )
+                await asyncio.sleep(delay)
+                continue
+            finally:
+                # Отмена или непредвиденная ошибка не должны оставить цепь
+                # в HALF_OPEN без исхода пробного запроса
+                if trial and not recorded:
+                    self.circuit_breaker.abandon_trial()
+
+            self.circuit_breaker.record_success()
+            return result
@@ -0,0 +1,79 @@
+from typing import Dict, List
+from datetime import datetime, timedelta
+import logging
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.db.models import PriceVerificationQueue
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_verifications(db: Session, items: List[Dict], delay_seconds: float = 60) -> int:
+    """
+    Поставить изменения цен в очередь на проверку
+
+    Более ранние записи тех же товаров удаляются: проверять имеет смысл
+    только последнюю отправленную цену. Фиксация транзакции остается
+    за вызывающим.
+
+    Args:
+        db: Сессия базы данных
+        items: Элементы с ключами product_id, expected_price, update_time
+        delay_seconds: Через сколько секунд после update_time проверять цену
+
+    Returns:
+        int количество поставленных в очередь элементов
+    """
+    if not items:
+        return 0
+
+    db.execute(
+        delete(PriceVerificationQueue).where(
+            PriceVerificationQueue.product_id.in_({item["product_id"] for item in items})
+        )
+    )
+    db.execute(insert(PriceVerificationQueue), [
+        {
+            "product_id": item["product_id"],
+            "expected_price": item["expected_price"],
+            "update_time": item["update_time"],
+            "due_at": item["update_time"] + timedelta(seconds=delay_seconds),
+            "attempts": 0
+        }
+        for item in items
+    ])
+    return len(items)
+
+
+def fetch_due_verifications(db: Session, now: datetime, limit: int) -> List[PriceVerificationQueue]:
+    """Получить не больше limit элементов, время проверки которых наступило"""
+    return list(db.scalars(
+        select(PriceVerificationQueue)
+        .where(PriceVerificationQueue.due_at <= now)
+        .order_by(PriceVerificationQueue.due_at, PriceVerificationQueue.id)
+        .limit(limit)
+    ))
+
+
+def reschedule_verifications(db: Session, ids: List[int], now: datetime, delay_seconds: float) -> None:
+    """Отложить проверку элементов и увеличить счетчик попыток"""
+    if not ids:
+        return
+    db.execute(
+        update(PriceVerificationQueue)
+        .where(PriceVerificationQueue.id.in_(ids))
+        .values(
+            attempts=PriceVerificationQueue.attempts + 1,
+            due_at=now + timedelta(seconds=delay_seconds)
+        )
+    )
+
+
+def remove_verifications(db: Session, ids: List[int]) -> None:
+    """Удалить обработанные элементы из очереди"""
+    if not ids:
+        return
+    db.execute(delete(PriceVerificationQueue).where(PriceVerificationQueue.id.in_(ids)))
+
@@ -3,88 +3,216 @@ from typing import List, Dict, Optional, Tuple
 from datetime import datetime
 import json
 
+import numpy as np
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Select, and_, select, update
 
-from app.db.database import get_db_session
-from app.db.models import SkuMonitoring, PriceHistory
+from app.db.database import get_async_db_session
+from app.db.bulk import bulk_insert_price_history
+from app.db.pagination import seek_conditions
+from app.db.models import SkuMonitoring
 from app.services.ozon_api import ozon_api, OzonApiError
-from app.services.price_calculator import calculate_price_adjustment, analyze_price_difference
+from app.services.price_calculator import calculate_price_adjustment, calculate_prices_batch
+from app.services.price_submitter import PriceSubmitter
+from app.services.verification_queue import enqueue_verifications
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
 
-async def update_product_price(
-    db: Session, 
-    product: SkuMonitoring,
-    price_verification_queue: List[Dict]
-) -> bool:
+def prepare_price_update(product: SkuMonitoring) -> Optional[Tuple[float, float]]:
     """
-    Обновляет цену товара в Ozon и сохраняет в истории изменений
+    Рассчитывает новую цену товара с учетом МРЦ и скидки
     
     Args:
-        db: Сессия базы данных
         product: Товар для обновления цены
-        price_verification_queue: Очередь на проверку изменений цен
         
     Returns:
-        bool: Успешно ли обновлена цена
+        Tuple[new_price, new_old_price] или None, если цены уже соответствуют расчетным
     """
-    try:
-        # Расчет новой цены и старой цены с учетом МРЦ и скидки
-        new_price, new_old_price = calculate_price_adjustment(
-            current_price=product.price,
-            front_price=product.front_price,
-            mrpc=product.mrpc,
-            discount=product.discount
+    # Расчет новой цены и старой цены с учетом МРЦ и скидки
+    new_price, new_old_price = calculate_price_adjustment(
+        current_price=product.price,
+        front_price=product.front_price,
+        mrpc=product.mrpc,
+        discount=product.discount
+    )
+    
+    # Проверяем, нужно ли обновлять цену
+    # Если текущая цена и old_price уже соответствуют расчетным, то пропускаем
+    if abs(product.price - new_price) < 0.01 and abs((product.old_price or 0) - new_old_price) < 0.01:
+        logger.debug(f"Product {product.product_id} prices already correct, skipping update")
+        return None
+    
+    return new_price, new_old_price
+
+
+def apply_confirmed_prices(db: Session, confirmed: List[Dict]) -> None:
+    """
+    Сохраняет подтвержденные Ozon изменения цен
+    
+    Обновляет цены товаров одним пакетным UPDATE, добавляет записи в историю
+    изменений и ставит товары в очередь на проверку. Фиксация транзакции
+    остается за вызывающим.
+    
+    Args:
+        db: Сессия базы данных
+        confirmed: Подтвержденные изменения из PriceSubmitter.submit()
+    """
+    if not confirmed:
+        return
+    
+    now = datetime.now()
+    
+    # Обновляем цены в товарах
+    db.execute(update(SkuMonitoring), [
+        {
+            "id": item["id"],
+            "price": item["price"],
+            "old_price": item["old_price"],
+            "update_timestamp": now
+        }
+        for item in confirmed
+    ])
+    
+    # Создаем записи в истории изменений (на PostgreSQL - через COPY)
+    bulk_insert_price_history(db, [
+        {
+            "product_id": item["product_id"],
+            "timestamp": now,
+            "showcase_price": item["showcase_price"],
+            "old_price": item["previous_price"],
+            "new_price": item["price"]
+        }
+        for item in confirmed
+    ])
+    
+    # Добавляем товары в очередь на проверку
+    enqueue_verifications(
+        db,
+        [
+            {
+                "product_id": item["product_id"],
+                "expected_price": item["price"],
+                "update_time": now
+            }
+            for item in confirmed
+        ],
+        delay_seconds=settings.VERIFICATION_DELAY
+    )
+    
+    for item in confirmed:
+        logger.info(
+            f"Updated price for product {item['product_id']}: "
+            f"new_price={item['price']}, new_old_price={item['old_price']}"
         )
+
+
+async def submit_price_updates(db: AsyncSession, submitter: PriceSubmitter) -> Dict:
+    """
+    Отправляет накопленные изменения цен и сохраняет подтвержденные
+    
+    Returns:
+        Dict с результатами:
+        {
+            "updated": int,       # Количество подтвержденных обновлений
+            "errors": List[Dict]  # Ошибки по товарам (product_id, error)
+        }
+    """
+    if not len(submitter):
+        return {"updated": 0, "errors": []}
+    
+    result = await submitter.submit()
+    
+    for item in result["failed"]:
+        logger.error(f"Error updating price for product {item['product_id']}: {item['error']}")
+    
+    # В историю и очередь на проверку попадают только подтвержденные изменения
+    await db.run_sync(apply_confirmed_prices, result["confirmed"])
+    
+    return {
+        "updated": len(result["confirmed"]),
+        "errors": [
+            {"product_id": item["product_id"], "error": item["error"]}
+            for item in result["failed"]
+        ]
+    }
+
+
+async def update_products_prices(db: AsyncSession, products: List[SkuMonitoring]) -> Dict:
+    """
+    Обновляет цены товаров в Ozon пакетами и сохраняет подтвержденные изменения
+    
+    Args:
+        db: Сессия базы данных
+        products: Товары для обновления цены
         
-        # Проверяем, нужно ли обновлять цену
-        # Если текущая цена и old_price уже соответствуют расчетным, то пропускаем
-        if abs(product.price - new_price) < 0.01 and abs(product.old_price - new_old_price) < 0.01:
-            logger.debug(f"Product {product.product_id} prices already correct, skipping update")
-            return False
-            
-        # Отправляем запрос на обновление цены в Ozon API
-        await ozon_api.set_product_prices([{
-            "product_id": product.product_id,
-            "price": new_price,
-            "old_price": new_old_price,
-            "min_price": new_price
-        }])
+    Returns:
+        Dict с результатами:
+        {
+            "updated": int,       # Количество подтвержденных обновлений
+            "errors": List[Dict]  # Ошибки по товарам (product_id, error)
+        }
+    """
+    submitter = PriceSubmitter(ozon_api, batch_size=settings.OZON_PRICES_BATCH_SIZE)
+    
+    for product in products:
+        prices = prepare_price_update(product)
+        if prices is None:
+            continue
         
-        # Создаем запись в истории изменений
-        price_history = PriceHistory(
-            product_id=product.product_id,
-            timestamp=datetime.now(),
+        new_price, new_old_price = prices
+        submitter.add(
+            product.product_id,
+            price=new_price,
+            old_price=new_old_price,
+            id=product.id,
             showcase_price=product.front_price,
-            old_price=product.price,
-            new_price=new_price
+            previous_price=product.price
         )
-        db.add(price_history)
-        
-        # Обновляем цены в модели товара
-        product.price = new_price
-        product.old_price = new_old_price
-        product.update_timestamp = datetime.now()
-        
-        # Добавляем товар в очередь на проверку
-        price_verification_queue.append({
-            "product_id": product.product_id,
-            "expected_price": new_price,
-            "update_time": datetime.now()
-        })
-        
-        logger.info(f"Updated price for product {product.product_id}: new_price={new_price}, new_old_price={new_old_price}")
-        return True
-        
-    except OzonApiError as e:
-        logger.error(f"Error updating price for product {product.product_id}: {str(e)}")
-        return False
-    except Exception as e:
-        logger.error(f"Unexpected error updating product {product.product_id}: {str(e)}")
-        return False
+    
+    return await submit_price_updates(db, submitter)
+
+
+# Ключ, по которому выборка товаров на поддержание МРЦ читается частями
+MRPC_SCAN_KEY = (SkuMonitoring.mrpc, SkuMonitoring.id)
+
+
+def mrpc_scan_query(limit: int, after: Optional[Tuple[float, int]] = None) -> Select:
+    """
+    Часть выборки активных товаров с МРЦ и ценой на витрине
+    
+    Читаются только нужные колонки, без создания ORM-объектов. Части
+    выбираются по ключу (mrpc, id) в порядке индекса
+    ix_sku_monitoring_active_available_mrpc, поэтому между частями не
+    остается открытого курсора и транзакцию можно фиксировать после
+    каждого пакета, отправленного в Ozon.
+    
+    Args:
+        limit: Размер части
+        after: Ключ (mrpc, id) последней строки предыдущей части
+    """
+    query = select(
+        SkuMonitoring.id,
+        SkuMonitoring.product_id,
+        SkuMonitoring.price,
+        SkuMonitoring.old_price,
+        SkuMonitoring.front_price,
+        SkuMonitoring.mrpc,
+        SkuMonitoring.discount
+    ).where(
+        and_(
+            SkuMonitoring.active == True,
+            SkuMonitoring.mrpc > 0,
+            SkuMonitoring.available == True,
+            # Товары без цены на витрине пропускаются
+            SkuMonitoring.front_price > 0
+        )
+    )
+    if after is not None:
+        query = query.where(*seek_conditions(MRPC_SCAN_KEY, after))
+    return query.order_by(*MRPC_SCAN_KEY).limit(limit)
 
 
 async def maintain_mrpc_prices():
@@ -92,76 +220,91 @@ async def maintain_mrpc_prices():
     Задача поддержания цен в соответствии с МРЦ и скидками
     
     Процесс:
-    1. Получение списка товаров с заданным МРЦ
-    2. Для каждого товара:
-       - Проверка текущей цены на витрине
-       - Сравнение с установленным МРЦ
+    1. Чтение активных товаров с заданным МРЦ и ценой на витрине частями
+       по MRPC_SCAN_CHUNK_SIZE строк (только нужные колонки)
+    2. Для каждой части одним пакетным расчетом:
+       - Сравнение цены на витрине с установленным МРЦ
        - Расчет отклонений
-       - Если товар активен (active = True):
-         * Расчет новой цены
-         * Расчет old_price с учетом скидки (если задана)
-         * Отправка запроса на изменение цены в Ozon API
-         * Добавление в очередь на проверку изменения
-         * Сохранение в истории изменений
+       - Расчет новой цены и old_price с учетом скидки (если задана)
+    3. Отправка цен в Ozon API пакетами до 1000 товаров по мере накопления
+    4. Для подтвержденных Ozon изменений: пакетное обновление цен,
+       добавление в очередь на проверку и сохранение в истории изменений;
+       транзакция фиксируется после каждого пакета
+    
+    Память на запуск не зависит от размера каталога: одновременно хранится
+    одна часть выборки и не больше одного пакета изменений.
     """
     logger.info("Starting maintain MRPC prices task")
     
-    price_verification_queue = []
-    
     try:
-        with get_db_session() as db:
-            # Получаем список товаров с заданным МРЦ и активированным мониторингом
-            active_products = db.query(SkuMonitoring).filter(
-                and_(
-                    SkuMonitoring.active == True,
-                    SkuMonitoring.mrpc > 0,
-                    SkuMonitoring.available == True
-                )
-            ).all()
-            
-            logger.info(f"Found {len(active_products)} active products with MRPC")
-            
+        async with get_async_db_session() as db:
+            submitter = PriceSubmitter(ozon_api, batch_size=settings.OZON_PRICES_BATCH_SIZE)
+            scanned_count = 0
             updated_count = 0
+            error_count = 0
             
-            # Обрабатываем каждый товар
-            for product in active_products:
-                # Если нет цены на витрине, пропускаем
-                if not product.front_price or product.front_price <= 0:
-                    logger.debug(f"Product {product.product_id} has no front price, skipping")
-                    continue
+            last_key = None
+            while True:
+                chunk = (await db.execute(
+                    mrpc_scan_query(settings.MRPC_SCAN_CHUNK_SIZE, after=last_key)
+                )).all()
+                if not chunk:
+                    break
+                scanned_count += len(chunk)
+                last_key = (chunk[-1].mrpc, chunk[-1].id)
+                ids, product_ids, prices, old_prices, front_prices, mrpcs, discounts = zip(*chunk)
                 
-                # Анализируем разницу между ценой на витрине и МРЦ
-                price_diff = analyze_price_difference(
-                    front_price=product.front_price,
-                    target_price=product.mrpc,
+                # Разница между ценой на витрине и МРЦ и новые цены для всей части сразу
+                calculated = calculate_prices_batch(
+                    price=prices,
+                    old_price=old_prices,
+                    front_price=front_prices,
+                    mrpc=mrpcs,
+                    discount=discounts,
                     threshold_percent=1.0  # 1% порог отклонения
                 )
                 
-                # Если цена на витрине отличается от МРЦ больше чем на порог,
-                # или изменилась скидка, обновляем цену
-                needs_update = price_diff["needs_update"]
-                
-                if needs_update:
+                # Обновляются товары, у которых отклонение превышает порог,
+                # а рассчитанные цены отличаются от текущих
+                for i in np.flatnonzero(calculated["needs_update"] & calculated["price_changed"]):
                     logger.debug(
-                        f"Product {product.product_id} needs price update: "
-                        f"front_price={product.front_price}, mrpc={product.mrpc}, "
-                        f"difference={price_diff['difference_percent']:.2f}%"
+                        f"Product {product_ids[i]} needs price update: "
+                        f"front_price={front_prices[i]}, mrpc={mrpcs[i]}, "
+                        f"difference={calculated['difference_percent'][i]:.2f}%"
+                    )
+                    submitter.add(
+                        product_ids[i],
+                        price=float(calculated["new_price"][i]),
+                        old_price=float(calculated["new_old_price"][i]),
+                        id=ids[i],
+                        showcase_price=front_prices[i],
+                        previous_price=prices[i]
                     )
-                    
-                    # Обновляем цену
-                    if await update_product_price(db, product, price_verification_queue):
-                        updated_count += 1
+                
+                # Полные пакеты отправляются по ходу чтения, поэтому в памяти
+                # остается не больше одного пакета изменений
+                if len(submitter) >= submitter.batch_size:
+                    submitted = await submit_price_updates(db, submitter)
+                    # Ozon уже применил подтвержденные цены, поэтому история
+                    # и очередь на проверку фиксируются сразу, а писатель не
+                    # занят во время следующих запросов к Ozon
+                    await db.commit()
+                    updated_count += submitted["updated"]
+                    error_count += len(submitted["errors"])
             
-            # Сохраняем изменения в БД
-            db.commit()
+            submitted = await submit_price_updates(db, submitter)
+            await db.commit()
+            updated_count += submitted["updated"]
+            error_count += len(submitted["errors"])
             
-            # Сохраняем очередь на проверку в глобальный кэш или БД
-            # (в реальной имплементации нужно сохранять эту информацию между запусками)
-            # В данном примере просто логируем
-            logger.info(f"Added {len(price_verification_queue)} products to verification queue")
+            logger.info(f"Scanned {scanned_count} active products with MRPC")
+            logger.info(f"Added {updated_count} products to verification queue")
             
-            logger.info(f"MRPC price maintenance completed: updated {updated_count} products")
+            logger.info(
+                f"MRPC price maintenance completed: updated {updated_count} products, "
+                f"{error_count} errors"
+            )
             
     except Exception as e:
         logger.error(f"Error in maintain_mrpc_prices task: {str(e)}")
-        raise 
\ No newline at end of file
+        raise 
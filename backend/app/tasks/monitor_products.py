@@ -4,25 +4,32 @@ from datetime import datetime
 from contextlib import contextmanager
 import asyncio
 
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import update
 
-from app.db.database import get_db_session
+from app.db.database import get_async_db_session
+from app.db.bulk import bulk_upsert_products
 from app.db.models import SkuMonitoring
-from app.services.ozon_api import ozon_api, OzonApiError
-from app.services.front_price_api import front_price_api, FrontPriceApiError
+from app.services.ozon_api import ozon_api, OzonApiError, ProductListCheckpoint
+from app.services.front_price_api import FrontPriceApiError
+from app.services.front_price_cache import front_price_cache, entries_to_products
+from app.services.front_price_ingest import apply_front_prices
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Позиция обхода каталога между запусками: если обход прервался, следующий
+# запуск продолжит его с последней полученной страницы
+_catalog_checkpoint = ProductListCheckpoint()
+
 
 async def process_product_batch(product_ids: List[str]) -> List[Dict]:
-    """Получение полной информации о партии товаров из Ozon API"""
-    try:
-        return await ozon_api.get_product_info(product_ids)
-    except OzonApiError as e:
-        logger.error(f"Error fetching product info: {str(e)}")
-        return []
+    """Получение полной информации о партии товаров из Ozon API
+    
+    Временные сбои повторяются клиентом Ozon API; если партию получить
+    так и не удалось, выбрасывается OzonApiError.
+    """
+    return await ozon_api.get_product_info(product_ids)
 
 
 async def map_ozon_product_to_model(product_data: Dict) -> Dict:
@@ -71,109 +78,169 @@ async def map_ozon_product_to_model(product_data: Dict) -> Dict:
     }
 
 
-async def update_front_prices(db: Session, ozon_client_id: str) -> int:
+async def update_front_prices(db: AsyncSession, ozon_client_id: str) -> int:
     """Обновление цен товаров с витрины Ozon"""
     try:
-        # Получение всех товаров с витрины Ozon
-        products = await front_price_api.get_all_seller_products(ozon_client_id)
+        # Получение всех цен с витрины Ozon (из общего снимка, если он свежий)
+        prices = await front_price_cache.get_all(ozon_client_id)
         
-        updated_count = 0
-        current_time = datetime.now()
+        # Запись цен одним пакетным обновлением по индексу sku -> id
+        result = await db.run_sync(apply_front_prices, entries_to_products(prices))
+        updated_count = len(result["updated"])
         
-        for product in products:
-            sku_id = product.get("sku_id")
-            if not sku_id:
-                continue
-                
-            # Получение цены из объекта price
-            price_data = product.get("price", {})
-            card_price = price_data.get("card_price")
-            original_price = price_data.get("original")
-            discount_percent = price_data.get("discount_percent")
-            
-            if not card_price:
-                continue
-                
-            # Обновление цены в БД
-            product_in_db = db.query(SkuMonitoring).filter(SkuMonitoring.sku == sku_id).first()
-            
-            if product_in_db:
-                product_in_db.front_price = card_price
-                product_in_db.front_price_timestamp = current_time
-                updated_count += 1
-                
-        db.commit()
-        logger.info(f"Updated front prices for {updated_count} products")
+        await db.commit()
+        logger.info(
+            f"Updated front prices for {updated_count} products, "
+            f"{len(result['unchanged'])} unchanged"
+        )
         return updated_count
     except FrontPriceApiError as e:
         logger.error(f"Error updating front prices: {str(e)}")
         return 0
 
 
+async def _enumerate_products(id_queue: asyncio.Queue, batch_size: int, workers: int, stats: Dict) -> None:
+    """Стадия 1: обход каталога и нарезка product_id на партии"""
+    batch = []
+    try:
+        async for item in ozon_api.iter_product_list(checkpoint=_catalog_checkpoint):
+            batch.append(str(item["product_id"]))
+            stats["listed"] += 1
+            if len(batch) >= batch_size:
+                await id_queue.put(batch)
+                batch = []
+    except OzonApiError as e:
+        # Уже полученные товары обрабатываются до конца, а обход
+        # продолжится со следующего запуска
+        stats["enumeration_failed"] = True
+        logger.error(f"Product list enumeration interrupted after {stats['listed']} products: {str(e)}")
+    
+    if batch:
+        await id_queue.put(batch)
+    
+    # Сигнал завершения для каждого обработчика
+    for _ in range(workers):
+        await id_queue.put(None)
+
+
+async def _fetch_product_info(
+    id_queue: asyncio.Queue,
+    data_queue: asyncio.Queue,
+    workers_left: List[int],
+    stats: Dict
+) -> None:
+    """Стадия 2: получение информации о партиях товаров (несколько параллельных обработчиков)"""
+    try:
+        while True:
+            batch = await id_queue.get()
+            if batch is None:
+                break
+            
+            try:
+                batch_data = await process_product_batch(batch)
+            except OzonApiError as e:
+                # Партия пропускается, остальные товары обрабатываются дальше
+                stats["failed"] += len(batch)
+                logger.error(f"Error fetching product info for {len(batch)} products: {str(e)}")
+                continue
+            
+            if batch_data:
+                await data_queue.put([await map_ozon_product_to_model(item) for item in batch_data])
+    finally:
+        workers_left[0] -= 1
+    
+    # Последний завершившийся обработчик сообщает записи в БД об окончании.
+    # При отмене или ошибке сигнал не отправляется: запись в БД останавливает
+    # monitor_products, а ожидание места в полной очереди не завершилось бы
+    if workers_left[0] == 0:
+        await data_queue.put(None)
+
+
+async def _write_products(data_queue: asyncio.Queue, stats: Dict) -> None:
+    """Стадия 3: запись партий товаров в БД по мере поступления"""
+    async with get_async_db_session() as db:
+        while True:
+            rows = await data_queue.get()
+            if rows is None:
+                break
+            
+            counts = await db.run_sync(bulk_upsert_products, rows)
+            stats["new"] += counts["inserted"]
+            stats["updated"] += counts["updated"]
+            stats["unchanged"] += counts["unchanged"]
+            await db.commit()
+
+
+async def _update_front_prices_task(stats: Dict) -> None:
+    """Обновление цен с витрины в отдельной сессии параллельно с конвейером"""
+    async with get_async_db_session() as db:
+        stats["front_prices"] = await update_front_prices(db, settings.OZON_CLIENT_ID)
+
+
 async def monitor_products():
     """
     Задача мониторинга всех товаров продавца
     
-    Процесс:
-    1. Получение полного списка товаров из Ozon API
-    2. Для каждого товара:
-       - Обновление базовой информации (наличие, цены, статусы)
-       - Получение цены с витрины
-       - Обновление информации о доступности
-    3. Сохранение изменений в базе данных
-    4. Логирование результатов мониторинга
+    Процесс (потоковый конвейер с ограниченными очередями между стадиями):
+    1. Обход каталога Ozon API и нарезка product_id на партии
+    2. Несколько параллельных обработчиков получают информацию о партиях
+    3. Запись в БД выполняется по мере поступления партий
+    4. Параллельно обновляются цены с витрины
+    5. Логирование результатов мониторинга
+    
+    В памяти одновременно находится не больше MONITORING_QUEUE_SIZE партий
+    на каждой очереди, а общее время близко ко времени самой медленной стадии.
+    Сбой отдельной партии или обхода каталога не прерывает задачу: уже
+    полученные товары сохраняются, а пропущенные обновятся в следующем запуске.
     """
     logger.info("Starting products monitoring task")
     
+    batch_size = settings.MONITORING_BATCH_SIZE
+    workers = max(1, settings.MONITORING_WORKERS)
+    id_queue: asyncio.Queue = asyncio.Queue(maxsize=settings.MONITORING_QUEUE_SIZE)
+    data_queue: asyncio.Queue = asyncio.Queue(maxsize=settings.MONITORING_QUEUE_SIZE)
+    stats = {
+        "listed": 0,
+        "new": 0,
+        "updated": 0,
+        "unchanged": 0,
+        "failed": 0,
+        "front_prices": 0,
+        "enumeration_failed": False
+    }
+    workers_left = [workers]
+    
+    tasks = [
+        asyncio.create_task(_enumerate_products(id_queue, batch_size, workers, stats)),
+        *(
+            asyncio.create_task(_fetch_product_info(id_queue, data_queue, workers_left, stats))
+            for _ in range(workers)
+        ),
+        asyncio.create_task(_write_products(data_queue, stats)),
+        asyncio.create_task(_update_front_prices_task(stats)),
+    ]
+    
     try:
-        # Получение списка всех товаров
-        all_products = await ozon_api.get_product_list(limit=100)
-        product_ids = [str(item["product_id"]) for item in all_products]
-        
-        logger.info(f"Found {len(product_ids)} products in Ozon API")
-        
-        # Обработка товаров партиями для улучшения производительности
-        batch_size = 50
-        product_batches = [product_ids[i:i + batch_size] for i in range(0, len(product_ids), batch_size)]
-        
-        all_product_data = []
-        for batch in product_batches:
-            batch_data = await process_product_batch(batch)
-            all_product_data.extend(batch_data)
-        
-        # Обработка полученных данных и обновление БД
-        with get_db_session() as db:
-            updated_count = 0
-            new_count = 0
-            
-            # Сначала обновляем цены с витрины
-            front_prices_count = await update_front_prices(db, settings.OZON_CLIENT_ID)
-            
-            # Затем обрабатываем данные о товарах
-            for product_data in all_product_data:
-                model_data = await map_ozon_product_to_model(product_data)
-                
-                # Проверяем, существует ли товар в БД
-                existing_product = db.query(SkuMonitoring).filter(
-                    SkuMonitoring.product_id == model_data["product_id"]
-                ).first()
-                
-                if existing_product:
-                    # Обновляем существующий товар
-                    for key, value in model_data.items():
-                        if key != "front_price" and key != "front_price_timestamp":
-                            setattr(existing_product, key, value)
-                    updated_count += 1
-                else:
-                    # Создаем новый товар
-                    new_product = SkuMonitoring(**model_data)
-                    db.add(new_product)
-                    new_count += 1
-            
-            db.commit()
+        await asyncio.gather(*tasks)
         
-        logger.info(f"Monitoring completed: {new_count} new products, {updated_count} updated products, {front_prices_count} front prices updated")
+        logger.info(
+            f"Monitoring completed: {stats['listed']} products listed, {stats['new']} new products, "
+            f"{stats['updated']} updated products, {stats['unchanged']} unchanged products, "
+            f"{stats['failed']} failed products, {stats['front_prices']} front prices updated"
+        )
+        if stats["failed"] or stats["enumeration_failed"]:
+            logger.warning(
+                "Monitoring completed partially: "
+                + ("catalog enumeration was interrupted, " if stats["enumeration_failed"] else "")
+                + f"{stats['failed']} products were not refreshed"
+            )
         
     except Exception as e:
         logger.error(f"Error in monitor_products task: {str(e)}")
-        raise 
\ No newline at end of file
+        raise
+    finally:
+        # При ошибке одной стадии останавливаем остальные и дожидаемся их отмены
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
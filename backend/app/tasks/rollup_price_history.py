@@ -0,0 +1,158 @@
+import logging
+from typing import Dict, List, Optional
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy.orm import Session
+from sqlalchemy import delete, func, insert, select, update
+
+from app.db.database import get_async_db_session
+from app.db.models import PriceHistory, PriceHistoryDaily
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _new_aggregate(price: Optional[float]) -> Dict:
+    return {
+        "open_price": price,
+        "close_price": price,
+        "min_price": price,
+        "max_price": price,
+        "change_count": 1
+    }
+
+
+def _add_price(aggregate: Dict, price: Optional[float]) -> None:
+    """Учесть следующее по времени изменение цены в агрегате"""
+    aggregate["change_count"] += 1
+    if price is None:
+        return
+    if aggregate["open_price"] is None:
+        aggregate["open_price"] = price
+    aggregate["close_price"] = price
+    aggregate["min_price"] = price if aggregate["min_price"] is None else min(aggregate["min_price"], price)
+    aggregate["max_price"] = price if aggregate["max_price"] is None else max(aggregate["max_price"], price)
+
+
+def _merge_aggregates(earlier: PriceHistoryDaily, later: Dict) -> Dict:
+    """Объединить уже сохраненный агрегат дня с агрегатом более поздних записей"""
+    prices = [p for p in (earlier.min_price, later["min_price"]) if p is not None]
+    highs = [p for p in (earlier.max_price, later["max_price"]) if p is not None]
+    return {
+        "id": earlier.id,
+        "open_price": earlier.open_price if earlier.open_price is not None else later["open_price"],
+        "close_price": later["close_price"] if later["close_price"] is not None else earlier.close_price,
+        "min_price": min(prices) if prices else None,
+        "max_price": max(highs) if highs else None,
+        "change_count": earlier.change_count + later["change_count"]
+    }
+
+
+def rollup_price_history_day(db: Session, start: datetime, end: datetime) -> int:
+    """
+    Перенести записи истории цен за интервал [start, end) в дневные агрегаты
+    
+    Записи одного дня агрегируются по товарам (цена открытия и закрытия,
+    минимум, максимум, число изменений по new_price), агрегаты добавляются
+    или объединяются с уже сохраненными, а исходные записи удаляются.
+    Фиксация транзакции остается за вызывающим.
+    
+    Returns:
+        Количество перенесенных записей
+    """
+    day = start.date()
+    rows = db.execute(
+        select(PriceHistory.product_id, PriceHistory.new_price).where(
+            PriceHistory.timestamp >= start,
+            PriceHistory.timestamp < end
+        ).order_by(
+            PriceHistory.product_id,
+            PriceHistory.timestamp,
+            PriceHistory.id
+        ).execution_options(yield_per=1000)
+    )
+    
+    aggregates: Dict[str, Dict] = {}
+    moved = 0
+    for product_id, new_price in rows:
+        moved += 1
+        aggregate = aggregates.get(product_id)
+        if aggregate is None:
+            aggregates[product_id] = _new_aggregate(new_price)
+        else:
+            _add_price(aggregate, new_price)
+    
+    if not aggregates:
+        return 0
+    
+    existing = {
+        item.product_id: item
+        for item in db.query(PriceHistoryDaily).filter(
+            PriceHistoryDaily.day == day,
+            PriceHistoryDaily.product_id.in_(list(aggregates))
+        )
+    }
+    
+    inserts: List[Dict] = []
+    updates: List[Dict] = []
+    for product_id, aggregate in aggregates.items():
+        if product_id in existing:
+            updates.append(_merge_aggregates(existing[product_id], aggregate))
+        else:
+            inserts.append({"product_id": product_id, "day": day, **aggregate})
+    
+    if inserts:
+        db.execute(insert(PriceHistoryDaily), inserts)
+    if updates:
+        db.execute(update(PriceHistoryDaily), updates)
+    
+    db.execute(
+        delete(PriceHistory).where(
+            PriceHistory.timestamp >= start,
+            PriceHistory.timestamp < end
+        )
+    )
+    return moved
+
+
+async def rollup_price_history():
+    """
+    Задача переноса старой истории цен в дневные агрегаты
+    
+    Процесс:
+    1. Граница хранения - начало дня PRICE_HISTORY_RETENTION_DAYS дней назад
+    2. Для каждого дня до границы, начиная с самого старого:
+       - агрегирование записей по товарам в price_history_daily
+       - удаление перенесенных записей из price_history
+       - фиксация транзакции (по одному дню за раз)
+    """
+    logger.info("Starting price history rollup task")
+    
+    cutoff = datetime.combine(date.today() - timedelta(days=settings.PRICE_HISTORY_RETENTION_DAYS), time.min)
+    moved_total = 0
+    days = 0
+    
+    try:
+        async with get_async_db_session() as db:
+            while True:
+                # Самая старая запись берется по индексу (timestamp, id)
+                oldest = await db.scalar(
+                    select(func.min(PriceHistory.timestamp)).where(PriceHistory.timestamp < cutoff)
+                )
+                if oldest is None:
+                    break
+                
+                start = datetime.combine(oldest.date(), time.min)
+                end = min(start + timedelta(days=1), cutoff)
+                moved_total += await db.run_sync(rollup_price_history_day, start, end)
+                days += 1
+                await db.commit()
+        
+        logger.info(
+            f"Price history rollup completed: {moved_total} records moved "
+            f"into daily aggregates for {days} days older than {cutoff.date()}"
+        )
+    
+    except Exception as e:
+        logger.error(f"Error in rollup_price_history task: {str(e)}")
+        raise
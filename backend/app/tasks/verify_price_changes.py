@@ -1,18 +1,109 @@
 import logging
 from typing import List, Dict, Optional
 from datetime import datetime, timedelta
-import json
 
-from app.db.database import get_db_session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.database import get_async_db_session
 from app.db.models import SkuMonitoring
-from app.services.front_price_api import front_price_api, FrontPriceApiError
+from app.services.front_price_api import FrontPriceApiError
+from app.services.front_price_cache import front_price_cache, entries_to_products
+from app.services.front_price_ingest import apply_front_prices
+from app.services.verification_queue import (
+    fetch_due_verifications,
+    reschedule_verifications,
+    remove_verifications
+)
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
-# В реальной имплементации это должно храниться в базе данных или Redis
-# Для примера используем глобальную переменную
-PRICE_VERIFICATION_QUEUE = []
+
+async def resolve_front_prices(db: AsyncSession, items: List, now: datetime) -> Dict[str, Dict]:
+    """
+    Получение цен с витрины только для проверяемых товаров
+    
+    Цена, сохраненная в БД после отправки изменения и не старше
+    VERIFICATION_FRONT_PRICE_MAX_AGE (например, из обхода витрины в задаче
+    мониторинга), используется без запроса к витрине. Остальные SKU
+    запрашиваются у общего кэша цен витрины: он отдает записи, полученные
+    после отправки изменений, а недостающие ищет на витрине точечно.
+    Полученные цены сохраняются в БД.
+    
+    Args:
+        db: Сессия базы данных
+        items: Элементы очереди на проверку
+        now: Время запуска проверки
+        
+    Returns:
+        Dict product_id -> {"sku": str, "price": Optional[float]}; товары,
+        которых нет в БД, в результат не попадают
+        
+    Raises:
+        FrontPriceApiError: если витрина недоступна
+    """
+    rows = (await db.execute(
+        select(
+            SkuMonitoring.id,
+            SkuMonitoring.product_id,
+            SkuMonitoring.sku,
+            SkuMonitoring.front_price,
+            SkuMonitoring.front_price_timestamp
+        ).where(
+            SkuMonitoring.product_id.in_({item.product_id for item in items})
+        )
+    )).all()
+    products = {row.product_id: row for row in rows if row.sku}
+    max_age = timedelta(seconds=settings.VERIFICATION_FRONT_PRICE_MAX_AGE)
+    
+    result: Dict[str, Dict] = {}
+    skus_to_fetch = set()
+    fetched_after: Optional[datetime] = None
+    
+    for item in items:
+        row = products.get(item.product_id)
+        if row is None:
+            continue
+        
+        result[item.product_id] = {"sku": row.sku, "price": None}
+        captured_at = row.front_price_timestamp
+        if (
+            row.front_price
+            and captured_at is not None
+            and captured_at >= item.update_time
+            and now - captured_at <= max_age
+        ):
+            result[item.product_id]["price"] = row.front_price
+        else:
+            skus_to_fetch.add(row.sku)
+            if fetched_after is None or item.update_time > fetched_after:
+                fetched_after = item.update_time
+    
+    if skus_to_fetch:
+        fetched = await front_price_cache.get_prices(
+            settings.OZON_CLIENT_ID,
+            skus_to_fetch,
+            fetched_after=fetched_after
+        )
+        
+        for entry in result.values():
+            if entry["price"] is None and entry["sku"] in fetched:
+                entry["price"] = fetched[entry["sku"]].card_price or None
+        
+        # Сохраняем полученные цены, чтобы ими могли воспользоваться другие задачи
+        await db.run_sync(
+            apply_front_prices,
+            entries_to_products(fetched),
+            sku_index={row.sku: row.id for row in products.values()},
+            timestamp=now
+        )
+    
+    logger.debug(
+        f"Front prices for verification: {len(result) - len(skus_to_fetch)} reused from DB, "
+        f"{len(skus_to_fetch)} SKUs requested from front price cache"
+    )
+    return result
 
 
 async def verify_price_changes():
@@ -20,135 +111,118 @@ async def verify_price_changes():
     Проверка применения изменений цен
     
     Процесс:
-    1. Получение списка товаров из очереди на проверку
-    2. Для каждого товара:
-       - Получение актуальной цены с витрины
-       - Сравнение с ожидаемой ценой
+    1. Выборка из очереди в БД элементов, время проверки которых наступило,
+       частями по VERIFICATION_BATCH_SIZE
+    2. Получение цен с витрины только для SKU из выборки: свежие цены
+       берутся из БД, остальные ищутся на витрине точечно
+    3. Для каждого товара:
+       - Сравнение актуальной цены с ожидаемой
        - Если цена не изменилась:
-         * Отправка уведомления
          * Логирование ошибки
-    3. Очистка проверенных товаров из очереди
-    """
-    global PRICE_VERIFICATION_QUEUE
+         * Повторная проверка через VERIFICATION_RECHECK_DELAY,
+           пока с момента обновления не прошло 30 минут
+    4. Удаление проверенных и устаревших товаров из очереди
     
-    if not PRICE_VERIFICATION_QUEUE:
-        logger.debug("Price verification queue is empty")
-        return
-    
-    logger.info(f"Starting price verification for {len(PRICE_VERIFICATION_QUEUE)} products")
-    
-    # Копируем текущую очередь и очищаем глобальную
-    current_queue = PRICE_VERIFICATION_QUEUE.copy()
-    PRICE_VERIFICATION_QUEUE = []
-    
-    # Фильтруем элементы старше 1 часа для повторной проверки
+    Стоимость проверки зависит от размера очереди, а не от размера каталога.
+    """
     now = datetime.now()
-    filtered_queue = [
-        item for item in current_queue 
-        if now - item["update_time"] < timedelta(hours=1)
-    ]
-    
-    if len(filtered_queue) != len(current_queue):
-        logger.info(f"Removed {len(current_queue) - len(filtered_queue)} outdated items from verification queue")
-    
-    verification_results = []
-    verification_failures = []
+    verified_count = 0
+    failed_count = 0
+    processed_count = 0
     
     try:
-        # Получаем актуальные sku для проверяемых товаров
-        with get_db_session() as db:
-            product_ids = [item["product_id"] for item in filtered_queue]
-            
-            # Получаем продукты из БД для получения их SKU
-            products = db.query(SkuMonitoring).filter(
-                SkuMonitoring.product_id.in_(product_ids)
-            ).all()
-            
-            # Создаем словарь product_id -> sku
-            product_sku_map = {p.product_id: p.sku for p in products if p.sku}
-            
-            if not product_sku_map:
-                logger.warning("No products found in DB for verification")
-                return
+        async with get_async_db_session() as db:
+            while True:
+                due_items = await db.run_sync(fetch_due_verifications, now, settings.VERIFICATION_BATCH_SIZE)
+                if not due_items:
+                    break
+                
+                logger.info(f"Starting price verification for {len(due_items)} products")
+                processed_count += len(due_items)
+                
+                to_remove: List[int] = []
+                to_recheck: List[int] = []
                 
-            # Получаем текущие цены с витрины
-            try:
-                all_products = await front_price_api.get_all_seller_products(settings.OZON_CLIENT_ID)
+                # Элементы старше 1 часа удаляются без проверки
+                current_items = []
+                for item in due_items:
+                    if now - item.update_time < timedelta(hours=1):
+                        current_items.append(item)
+                    else:
+                        to_remove.append(item.id)
                 
-                # Создаем словарь sku -> front_price
-                sku_price_map = {}
-                for product in all_products:
-                    sku_id = product.get("sku_id")
-                    price_data = product.get("price", {})
-                    card_price = price_data.get("card_price")
+                if len(current_items) != len(due_items):
+                    logger.info(f"Removed {len(due_items) - len(current_items)} outdated items from verification queue")
+                
+                try:
+                    front_prices = await resolve_front_prices(db, current_items, now) if current_items else {}
+                except FrontPriceApiError as e:
+                    logger.error(f"Error getting front prices: {str(e)}")
                     
-                    if sku_id and card_price:
-                        sku_price_map[sku_id] = card_price
+                    # Текущая часть откладывается, остальные наступившие
+                    # элементы будут проверены при следующем запуске
+                    await db.run_sync(remove_verifications, to_remove)
+                    await db.run_sync(
+                        reschedule_verifications,
+                        [item.id for item in current_items],
+                        now,
+                        settings.VERIFICATION_RECHECK_DELAY
+                    )
+                    await db.commit()
+                    break
                 
-                # Проверяем каждый товар в очереди
-                for item in filtered_queue:
-                    product_id = item["product_id"]
-                    expected_price = item["expected_price"]
+                # Проверяем каждый товар
+                for item in current_items:
+                    product_id = item.product_id
+                    expected_price = item.expected_price
                     
                     # Проверяем, есть ли SKU для этого product_id
-                    if product_id not in product_sku_map:
+                    if product_id not in front_prices:
                         logger.warning(f"Product {product_id} not found in DB")
+                        to_remove.append(item.id)
                         continue
                     
-                    sku = product_sku_map[product_id]
+                    sku = front_prices[product_id]["sku"]
+                    actual_price = front_prices[product_id]["price"]
                     
                     # Проверяем, есть ли цена для этого SKU
-                    if sku not in sku_price_map:
+                    if actual_price is None:
                         logger.warning(f"SKU {sku} for product {product_id} not found in front prices")
-                        
-                        # Добавляем обратно в очередь для повторной проверки
-                        PRICE_VERIFICATION_QUEUE.append(item)
+                        to_recheck.append(item.id)
                         continue
                     
-                    actual_price = sku_price_map[sku]
-                    
                     # Сравниваем ожидаемую и актуальную цену
-                    price_matches = abs(expected_price - actual_price) < 0.01
-                    
-                    verification_result = {
-                        "product_id": product_id,
-                        "sku": sku,
-                        "expected_price": expected_price,
-                        "actual_price": actual_price,
-                        "verified": price_matches,
-                        "timestamp": now
-                    }
-                    
-                    verification_results.append(verification_result)
+                    if abs(expected_price - actual_price) < 0.01:
+                        verified_count += 1
+                        to_remove.append(item.id)
+                        continue
                     
-                    if not price_matches:
-                        verification_failures.append(verification_result)
-                        logger.warning(
-                            f"Price verification failed for product {product_id}: "
-                            f"expected {expected_price}, actual {actual_price}"
-                        )
-                        
-                        # Если прошло менее 30 минут с момента обновления, 
-                        # добавляем обратно в очередь для повторной проверки
-                        if now - item["update_time"] < timedelta(minutes=30):
-                            PRICE_VERIFICATION_QUEUE.append(item)
-                
-                # Если есть неподтвержденные изменения цен, логируем их
-                if verification_failures:
-                    logger.error(f"Price verification failed for {len(verification_failures)} products")
+                    failed_count += 1
+                    logger.warning(
+                        f"Price verification failed for product {product_id}: "
+                        f"expected {expected_price}, actual {actual_price} (attempt {item.attempts + 1})"
+                    )
                     
-                    # В реальной имплементации здесь можно отправить уведомление
-                    # или выполнить другие действия
-                else:
-                    logger.info(f"Price verification completed successfully for {len(verification_results)} products")
+                    # Если прошло менее 30 минут с момента обновления,
+                    # проверяем повторно позже
+                    if now - item.update_time < timedelta(minutes=30):
+                        to_recheck.append(item.id)
+                    else:
+                        to_remove.append(item.id)
                 
-            except FrontPriceApiError as e:
-                logger.error(f"Error getting front prices: {str(e)}")
-                
-                # Если произошла ошибка, возвращаем все элементы в очередь
-                PRICE_VERIFICATION_QUEUE.extend(filtered_queue)
+                await db.run_sync(remove_verifications, to_remove)
+                await db.run_sync(reschedule_verifications, to_recheck, now, settings.VERIFICATION_RECHECK_DELAY)
+                await db.commit()
+        
+        if processed_count == 0:
+            logger.debug("Price verification queue has no due items")
+        elif failed_count:
+            # В реальной имплементации здесь можно отправить уведомление
+            # или выполнить другие действия
+            logger.error(f"Price verification failed for {failed_count} products")
+        else:
+            logger.info(f"Price verification completed successfully for {verified_count} products")
         
     except Exception as e:
+        # Необработанные элементы остаются в очереди и будут проверены при следующем запуске
         logger.error(f"Error in verify_price_changes task: {str(e)}")
-        # Возвращаем элементы в очередь при непредвиденной ошибке
-        PRICE_VERIFICATION_QUEUE.extend(filtered_queue) 
\ No newline at end of file
@@ -1,43 +1,43 @@
 import os
-import sqlite3
+import pathlib
+import sys
 from dotenv import load_dotenv
+from sqlalchemy import create_engine, text
+
+# Скрипт запускается как файл (python migrations/run_migrations.py),
+# поэтому каталог backend добавляется в путь поиска модулей
+BACKEND_DIR = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND_DIR))
+
+from app.db.migrations import apply_migrations
 
 def run_migrations():
     load_dotenv()
     
-    # Получаем путь к базе данных из переменной окружения
+    # Получаем URL базы данных из переменной окружения (SQLite или PostgreSQL)
     database_url = os.getenv('DATABASE_URL', 'sqlite:///app.db')
-    db_path = database_url.replace('sqlite:///', '')
-    
-    conn = None
-    cur = None
+    engine = create_engine(database_url)
     
     try:
         # Подключаемся к базе данных
-        print(f"Подключение к базе данных: {db_path}")
-        conn = sqlite3.connect(db_path)
-        cur = conn.cursor()
+        print(f"Подключение к базе данных: {engine.url.render_as_string(hide_password=True)}")
+        
+        # Версионированные миграции из migrations/versions, как при старте приложения
+        applied = apply_migrations(engine)
+        print(f"Применено миграций: {len(applied)} {', '.join(applied)}".rstrip())
         
-        # Читаем и выполняем SQL-скрипт
-        with open('migrations/update_product_urls.sql', 'r') as f:
+        # Читаем и выполняем SQL-скрипт в одной транзакции
+        with open(BACKEND_DIR / 'migrations' / 'update_product_urls.sql', 'r') as f:
             sql = f.read()
-            # Изменяем синтаксис SQL для SQLite
-            sql = sql.replace('CONCAT(', '').replace(')', '')
-            cur.execute(sql)
+        with engine.begin() as conn:
+            conn.execute(text(sql))
         
-        # Фиксируем изменения
-        conn.commit()
         print("Миграция успешно выполнена")
         
     except Exception as e:
         print(f"Ошибка при выполнении миграции: {e}")
-        if conn:
-            conn.rollback()
     finally:
-        if cur:
-            cur.close()
-        if conn:
-            conn.close()
+        engine.dispose()
 
 if __name__ == "__main__":
-    run_migrations() 
\ No newline at end of file
+    run_migrations()
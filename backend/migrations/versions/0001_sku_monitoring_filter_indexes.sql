@@ -0,0 +1,13 @@
+-- Индексы для выборки товаров на поддержание МРЦ и фильтров списка товаров
+--
+-- Выборка maintain_mrpc_prices и /products/update-prices:
+--   active = true AND available = true AND mrpc > 0
+-- Равенства по active и available, затем диапазон по mrpc.
+-- Этот же индекс используется фильтром списка товаров по active
+-- (и по active вместе с has_stock).
+CREATE INDEX IF NOT EXISTS ix_sku_monitoring_active_available_mrpc
+    ON sku_monitoring (active, available, mrpc);
+
+-- Фильтр списка товаров только по наличию (has_stock)
+CREATE INDEX IF NOT EXISTS ix_sku_monitoring_available
+    ON sku_monitoring (available);
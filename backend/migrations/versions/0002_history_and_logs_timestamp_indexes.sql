@@ -0,0 +1,10 @@
+-- Индексы для keyset-пагинации истории цен и логов API по (timestamp, id)
+--
+-- Списки сортируются по timestamp DESC, id DESC и продолжаются с позиции
+-- последней записи предыдущей страницы, поэтому ключ сортировки должен
+-- читаться по индексу, без OFFSET и без сортировки всей таблицы.
+CREATE INDEX IF NOT EXISTS ix_price_history_timestamp_id
+    ON price_history (timestamp, id);
+
+CREATE INDEX IF NOT EXISTS ix_api_log_entry_timestamp_id
+    ON api_log_entry (timestamp, id);
@@ -0,0 +1,15 @@
+-- Триграммные индексы для поиска в списке товаров (PostgreSQL)
+--
+-- На PostgreSQL поиск по названию выполняется через ILIKE '%...%', а по SKU
+-- и product_id - через ILIKE '...%'. Оба вида условий читаются по
+-- GIN-индексам pg_trgm без полного прохода по таблице.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS ix_sku_monitoring_name_trgm
+    ON sku_monitoring USING gin (name gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS ix_sku_monitoring_sku_trgm
+    ON sku_monitoring USING gin (sku gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS ix_sku_monitoring_product_id_trgm
+    ON sku_monitoring USING gin (product_id gin_trgm_ops);
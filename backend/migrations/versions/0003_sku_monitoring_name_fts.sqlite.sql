@@ -0,0 +1,27 @@
+-- Полнотекстовый индекс FTS5 по названиям товаров для поиска в списке товаров
+--
+-- Таблица с внешним содержимым: текст хранится только в sku_monitoring,
+-- а индекс поддерживается триггерами при вставке, изменении названия и
+-- удалении товара, в том числе при массовой записи мониторинга.
+CREATE VIRTUAL TABLE IF NOT EXISTS sku_monitoring_fts USING fts5(
+    name,
+    content='sku_monitoring',
+    content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER IF NOT EXISTS sku_monitoring_fts_insert AFTER INSERT ON sku_monitoring BEGIN
+    INSERT INTO sku_monitoring_fts (rowid, name) VALUES (new.id, new.name);
+END;
+
+CREATE TRIGGER IF NOT EXISTS sku_monitoring_fts_delete AFTER DELETE ON sku_monitoring BEGIN
+    INSERT INTO sku_monitoring_fts (sku_monitoring_fts, rowid, name) VALUES ('delete', old.id, old.name);
+END;
+
+CREATE TRIGGER IF NOT EXISTS sku_monitoring_fts_update AFTER UPDATE OF name ON sku_monitoring BEGIN
+    INSERT INTO sku_monitoring_fts (sku_monitoring_fts, rowid, name) VALUES ('delete', old.id, old.name);
+    INSERT INTO sku_monitoring_fts (rowid, name) VALUES (new.id, new.name);
+END;
+
+-- Индексирование уже загруженных товаров
+INSERT INTO sku_monitoring_fts (sku_monitoring_fts) VALUES ('rebuild');
@@ -0,0 +1,8 @@
+-- Индекс истории цен для фильтра по товару с сортировкой по времени
+--
+-- Таблицу дневных агрегатов price_history_daily создает модель
+-- PriceHistoryDaily (Base.metadata.create_all перед миграциями): так
+-- первичный ключ получает автоинкремент в синтаксисе своей СУБД
+-- (SERIAL/IDENTITY на PostgreSQL), а схема таблицы описана в одном месте.
+CREATE INDEX IF NOT EXISTS ix_price_history_product_id_timestamp_id
+    ON price_history (product_id, timestamp, id);
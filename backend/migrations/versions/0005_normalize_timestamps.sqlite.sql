@@ -0,0 +1,19 @@
+-- Единый формат времени в ключах keyset-пагинации
+--
+-- Записи, время которых выставлял func.now(), хранятся как
+-- 'YYYY-MM-DD HH:MM:SS', а SQLAlchemy передает параметры как
+-- 'YYYY-MM-DD HH:MM:SS.ffffff'. SQLite сравнивает такие значения как строки,
+-- поэтому условие timestamp < :ts выбирало и запись, на которой стоит курсор,
+-- и листание по курсору не продвигалось. Модели теперь задают время на
+-- клиенте, а старые записи приводятся к формату с микросекундами.
+--
+-- CURRENT_TIMESTAMP в SQLite - время UTC, а клиент пишет локальное время
+-- (datetime.now), с которым сравнивают остальные части приложения.
+-- Поэтому старые записи заодно переводятся в локальное время сервера.
+UPDATE price_history
+    SET timestamp = datetime(timestamp, 'localtime') || '.000000'
+    WHERE length(timestamp) = 19;
+
+UPDATE api_log_entry
+    SET timestamp = datetime(timestamp, 'localtime') || '.000000'
+    WHERE length(timestamp) = 19;
@@ -0,0 +1,44 @@
+import os
+import tempfile
+
+# Настройки приложения читаются при импорте app, поэтому окружение
+# задается до импорта модулей приложения
+_TMP_DIR = tempfile.mkdtemp(prefix="ozon-price-tests-")
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "test-secret-key-for-jwt-signing-only")
+os.environ.setdefault("OZON_CLIENT_ID", "test-client")
+os.environ.setdefault("OZON_API_KEY", "test-api-key")
+os.environ.setdefault("FRONT_PRICE_API_URL", "http://127.0.0.1:9")
+os.environ.setdefault("LOG_FILE", os.path.join(_TMP_DIR, "app.log"))
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.database import Base
+from app.db.migrations import apply_migrations
+import app.db.models  # noqa: F401 - регистрация моделей в Base.metadata
+
+
+@pytest.fixture
+def db_engine():
+    """Отдельная БД SQLite в памяти со схемой моделей и миграциями"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    apply_migrations(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(db_engine):
+    session = sessionmaker(bind=db_engine, autoflush=False)()
+    try:
+        yield session
+    finally:
+        session.close()
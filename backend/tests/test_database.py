@@ -0,0 +1,69 @@
+import asyncio
+
+from fastapi.routing import APIRoute
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.db.database import Base, create_engines, get_db, make_async_url
+from app.db.models import ApiLogEntry
+
+
+def dependency_calls(dependant):
+    for dependency in dependant.dependencies:
+        yield dependency.call
+        yield from dependency_calls(dependency)
+
+
+def test_api_routes_do_not_use_sync_session():
+    # Синхронная сессия в async-маршруте блокирует цикл событий на время
+    # ожидания блокировки записи, поэтому маршруты пишут только через
+    # асинхронного писателя
+    from app.api.routes import api_logs, auth, price_history, products, settings, users
+
+    routes = [
+        f"{module.__name__}: {', '.join(sorted(route.methods))} {route.path}"
+        for module in (api_logs, auth, price_history, products, settings, users)
+        for route in module.router.routes
+        if isinstance(route, APIRoute) and get_db in set(dependency_calls(route.dependant))
+    ]
+
+    assert routes == []
+
+
+async def test_async_writes_are_serialized_by_single_writer(tmp_path):
+    url = f"sqlite:///{tmp_path / 'app.db'}"
+    writer, reader = create_engines(url)
+    async_writer, async_reader = create_engines(make_async_url(url), create=create_async_engine)
+    Base.metadata.create_all(bind=writer)
+    writer.dispose()
+    reader.dispose()
+
+    async def write(name: str) -> None:
+        async with AsyncSession(async_writer) as db:
+            await db.execute(insert(ApiLogEntry), {"endpoint": f"/{name}", "method": "POST"})
+            # Транзакция удерживает единственное соединение писателя; другие
+            # сессии ждут его в очереди пула, не блокируя цикл событий
+            await asyncio.sleep(0.01)
+            await db.commit()
+
+    ticks = 0
+
+    async def count_ticks() -> None:
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.005)
+            ticks += 1
+
+    ticker = asyncio.create_task(count_ticks())
+    try:
+        await asyncio.gather(*(write(f"w{i}") for i in range(20)))
+
+        async with AsyncSession(async_writer) as db:
+            assert (await db.execute(select(func.count()).select_from(ApiLogEntry))).scalar() == 20
+        assert async_writer.sync_engine.pool.size() == 1
+        # Пока записи ждали писателя, цикл событий продолжал работать
+        assert ticks >= 10
+    finally:
+        ticker.cancel()
+        await async_writer.dispose()
+        await async_reader.dispose()
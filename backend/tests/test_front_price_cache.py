@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta
+
+from app.services.front_price_cache import FrontPriceCache
+
+
+def product(sku, price):
+    return {"sku_id": sku, "price": {"card_price": price, "original": price, "discount_percent": 0}}
+
+
+class FakeFrontPriceApi:
+    """Витрина в памяти со счетчиками обходов и поисков"""
+
+    def __init__(self, prices):
+        self.prices = prices
+        self.crawls = 0
+        self.searches = []
+
+    async def get_all_seller_products(self, seller_id):
+        self.crawls += 1
+        return [product(sku, price) for sku, price in self.prices.items()]
+
+    async def find_seller_products(self, seller_id, skus):
+        self.searches.append(set(skus))
+        return [product(sku, self.prices[sku]) for sku in skus if sku in self.prices]
+
+
+async def test_missing_sku_is_not_searched_again_after_full_walk():
+    api = FakeFrontPriceApi({"1": 100.0, "2": 200.0})
+    cache = FrontPriceCache(api, ttl=300.0)
+    updated_at = datetime.now() - timedelta(seconds=1)
+
+    first = await cache.get_prices("seller", ["1", "404"], fetched_after=updated_at)
+    second = await cache.get_prices("seller", ["1", "404"], fetched_after=updated_at)
+
+    assert set(first) == set(second) == {"1"}
+    assert api.searches == [{"1", "404"}]
+    assert cache.stats()["sku_absent"] == 1
+
+
+async def test_missing_sku_is_searched_again_for_newer_update():
+    api = FakeFrontPriceApi({"1": 100.0})
+    cache = FrontPriceCache(api, ttl=300.0)
+    await cache.get_prices("seller", ["404"], fetched_after=datetime.now() - timedelta(seconds=1))
+
+    api.prices["404"] = 50.0
+    result = await cache.get_prices("seller", ["404"], fetched_after=datetime.now())
+
+    assert result["404"].card_price == 50.0
+    assert len(api.searches) == 2
+
+
+async def test_fresh_full_crawl_answers_for_absent_sku_with_fetched_after():
+    api = FakeFrontPriceApi({"1": 100.0})
+    cache = FrontPriceCache(api, ttl=300.0)
+    updated_at = datetime.now() - timedelta(seconds=1)
+    await cache.get_all("seller")
+
+    result = await cache.get_prices("seller", ["1", "404"], fetched_after=updated_at)
+
+    assert set(result) == {"1"}
+    assert api.searches == []
+
+
+async def test_many_missing_skus_use_shared_full_crawl():
+    api = FakeFrontPriceApi({str(i): float(i) for i in range(1, 21)})
+    cache = FrontPriceCache(api, ttl=300.0, crawl_threshold=5)
+
+    result = await cache.get_prices("seller", [str(i) for i in range(1, 11)])
+
+    assert len(result) == 10
+    assert api.crawls == 1
+    assert api.searches == []
+
+
+async def test_full_crawl_results_are_returned_with_zero_ttl():
+    api = FakeFrontPriceApi({str(i): float(i) for i in range(1, 21)})
+    cache = FrontPriceCache(api, ttl=0.0, crawl_threshold=5)
+
+    result = await cache.get_prices(
+        "seller", [str(i) for i in range(1, 16)], fetched_after=datetime.now() - timedelta(seconds=1)
+    )
+
+    assert len(result) == 15
+    assert api.crawls == 1
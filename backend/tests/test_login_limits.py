@@ -0,0 +1,86 @@
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.api.routes import auth
+from app.core import login_limiter
+from app.core.config import settings
+from app.db.database import get_async_db
+
+PASSWORD = "correct-password"
+
+
+@pytest.fixture
+def login_app(monkeypatch):
+    """Маршрут входа с проверкой пароля без БД и со сброшенными лимитами"""
+    async def authenticate_user(db, username, password):
+        return SimpleNamespace(username=username) if password == PASSWORD else None
+
+    async def no_db():
+        yield None
+
+    monkeypatch.setattr(auth, "authenticate_user", authenticate_user)
+    monkeypatch.setattr(settings, "LOGIN_FAILURE_DELAY", 0.001)
+    for limiter in (
+        login_limiter.login_client_limiter,
+        login_limiter.login_ip_limiter,
+        login_limiter.login_username_limiter
+    ):
+        monkeypatch.setattr(limiter, "_attempts", {})
+
+    app = FastAPI()
+    app.include_router(auth.router, prefix="/auth")
+    app.dependency_overrides[get_async_db] = no_db
+    return app
+
+
+async def login(app, ip, password, username="admin"):
+    transport = httpx.ASGITransport(app=app, client=(ip, 50000))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.post("/auth/login", data={"username": username, "password": password})
+
+
+async def test_failures_from_one_ip_do_not_lock_out_the_user(login_app):
+    for _ in range(settings.LOGIN_MAX_FAILED_ATTEMPTS):
+        assert (await login(login_app, "10.0.0.66", "wrong")).status_code == 401
+
+    blocked = await login(login_app, "10.0.0.66", PASSWORD)
+    assert blocked.status_code == 429
+    assert int(blocked.headers["Retry-After"]) > 0
+
+    # Тот же пользователь с другого IP входит, хотя и с задержкой
+    assert login_limiter.login_delay("10.0.0.1", "admin") > 0
+    assert (await login(login_app, "10.0.0.1", PASSWORD)).status_code == 200
+
+
+async def test_successful_logins_are_not_counted(login_app):
+    for _ in range(settings.LOGIN_MAX_FAILED_ATTEMPTS_PER_IP + 5):
+        assert (await login(login_app, "192.168.1.1", PASSWORD)).status_code == 200
+
+    assert login_limiter.login_delay("192.168.1.1", "admin") == 0.0
+
+
+async def test_correct_password_resets_the_client_failures(login_app):
+    for _ in range(settings.LOGIN_MAX_FAILED_ATTEMPTS - 1):
+        await login(login_app, "10.0.0.2", "wrong")
+    assert (await login(login_app, "10.0.0.2", PASSWORD)).status_code == 200
+
+    for _ in range(settings.LOGIN_MAX_FAILED_ATTEMPTS - 1):
+        assert (await login(login_app, "10.0.0.2", "wrong")).status_code == 401
+
+
+def test_login_delay_doubles_up_to_the_maximum(monkeypatch):
+    limiter = login_limiter.AttemptLimiter(max_attempts=3, window=60)
+    monkeypatch.setattr(login_limiter, "login_ip_limiter", limiter)
+    monkeypatch.setattr(login_limiter, "login_username_limiter", login_limiter.AttemptLimiter(3, 60))
+    monkeypatch.setattr(settings, "LOGIN_FAILURE_DELAY", 0.5)
+    monkeypatch.setattr(settings, "LOGIN_FAILURE_MAX_DELAY", 2.0)
+
+    delays = []
+    for _ in range(6):
+        limiter.record("10.0.0.3")
+        delays.append(login_limiter.login_delay("10.0.0.3", "admin"))
+
+    assert delays == [0.0, 0.0, 0.5, 1.0, 2.0, 2.0]
@@ -0,0 +1,46 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+from app.core.config import settings
+from app.tasks import monitor_products as monitor
+
+
+class FakeSession:
+    async def run_sync(self, fn, *args, **kwargs):
+        raise RuntimeError("database is locked")
+
+    async def commit(self):
+        pass
+
+
+@asynccontextmanager
+async def fake_db_session():
+    yield FakeSession()
+
+
+async def test_failed_writer_stops_pipeline_without_leaking_tasks(monkeypatch):
+    async def iter_product_list(checkpoint=None):
+        for product_id in range(100):
+            yield {"product_id": product_id}
+
+    async def process_product_batch(product_ids):
+        return [{"id": product_id} for product_id in product_ids]
+
+    async def update_front_prices_task(stats):
+        pass
+
+    monkeypatch.setattr(monitor.ozon_api, "iter_product_list", iter_product_list)
+    monkeypatch.setattr(monitor, "process_product_batch", process_product_batch)
+    monkeypatch.setattr(monitor, "get_async_db_session", fake_db_session)
+    monkeypatch.setattr(monitor, "_update_front_prices_task", update_front_prices_task)
+    monkeypatch.setattr(settings, "MONITORING_BATCH_SIZE", 1)
+    monkeypatch.setattr(settings, "MONITORING_WORKERS", 3)
+    monkeypatch.setattr(settings, "MONITORING_QUEUE_SIZE", 1)
+
+    # Обработчики ждут места в полной очереди, когда запись в БД падает
+    with pytest.raises(RuntimeError, match="database is locked"):
+        await asyncio.wait_for(monitor.monitor_products(), timeout=5)
+
+    assert asyncio.all_tasks() == {asyncio.current_task()}
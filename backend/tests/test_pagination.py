@@ -0,0 +1,115 @@
+from datetime import datetime, timezone
+import time
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.database import Base
+from app.db.migrations import apply_migrations
+from app.db.models import ApiLogEntry
+from app.db.pagination import decode_cursor, encode_cursor, paginate
+
+KEY = (ApiLogEntry.timestamp, ApiLogEntry.id)
+
+
+def walk(db, per_page):
+    """Пролистать логи API по курсору до конца, как клиент /api-logs"""
+    pages = []
+    cursor = None
+    while True:
+        page = paginate(
+            db.query(ApiLogEntry), KEY, per_page,
+            cursor=cursor, descending=True, include_total=False
+        )
+        pages.append([item.id for item in page["items"]])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return pages
+        assert len(pages) <= 100, "cursor does not advance"
+
+
+def add_logs(db, count, timestamp=None):
+    for _ in range(count):
+        db.add(ApiLogEntry(endpoint="/v1/product/import/prices", method="POST", timestamp=timestamp))
+    db.commit()
+
+
+def test_cursor_walks_rows_with_equal_timestamps(db):
+    add_logs(db, 7, timestamp=datetime(2026, 1, 1, 12, 0, 0))
+
+    assert walk(db, 3) == [[7, 6, 5], [4, 3, 2], [1]]
+
+
+def test_cursor_walks_rows_with_default_timestamps(db):
+    # Записи, созданные в течение одной секунды, различаются только id
+    add_logs(db, 7)
+
+    pages = walk(db, 3)
+
+    assert sorted(sum(pages, [])) == list(range(1, 8))
+    assert [len(page) for page in pages] == [3, 3, 1]
+
+
+def test_migration_normalizes_server_default_timestamps():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for _ in range(7):
+            conn.execute(text(
+                "INSERT INTO api_log_entry (timestamp, endpoint, method) "
+                "VALUES ('2026-01-01 12:00:00', '/v1/product/list', 'POST')"
+            ))
+
+    apply_migrations(engine)
+
+    db = sessionmaker(bind=engine)()
+    try:
+        assert walk(db, 3) == [[7, 6, 5], [4, 3, 2], [1]]
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def test_migration_converts_server_default_timestamps_to_local_time(monkeypatch):
+    # CURRENT_TIMESTAMP писал UTC, модели пишут локальное время
+    monkeypatch.setenv("TZ", "Europe/Moscow")
+    time.tzset()
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    try:
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            conn.execute(text(
+                "INSERT INTO api_log_entry (timestamp, endpoint, method) "
+                "VALUES ('2026-01-01 12:00:00', '/v1/product/list', 'POST')"
+            ))
+
+        apply_migrations(engine)
+
+        db = sessionmaker(bind=engine)()
+        try:
+            expected = datetime(2026, 1, 1, 12, tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+            assert db.query(ApiLogEntry.timestamp).scalar() == expected == datetime(2026, 1, 1, 15)
+        finally:
+            db.close()
+    finally:
+        engine.dispose()
+        monkeypatch.undo()
+        time.tzset()
+
+
+def test_offset_page_cursor_continues_keyset(db):
+    add_logs(db, 5, timestamp=datetime(2026, 1, 1, 12, 0, 0))
+
+    first = paginate(db.query(ApiLogEntry), KEY, 2, page=1, descending=True)
+    second = paginate(db.query(ApiLogEntry), KEY, 2, cursor=first["next_cursor"], descending=True)
+
+    assert [item.id for item in first["items"]] == [5, 4]
+    assert [item.id for item in second["items"]] == [3, 2]
+    assert first["total"] == 5
+
+
+def test_cursor_round_trip():
+    values = [datetime(2026, 1, 1, 12, 0, 0, 123456), 42]
+
+    assert decode_cursor(encode_cursor(values), 2) == values
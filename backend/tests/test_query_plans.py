@@ -0,0 +1,71 @@
+"""Регрессионные проверки планов запросов к индексам из миграций
+
+Планы читаются через EXPLAIN QUERY PLAN на схеме, созданной моделями и
+миграциями, поэтому тест падает, если индекс пропал из миграции или
+запрос перестал ему соответствовать.
+"""
+from sqlalchemy import and_, select, text
+
+from app.db.models import ApiLogEntry, PriceHistory, SkuMonitoring
+from app.db.pagination import seek_conditions
+from app.tasks.maintain_mrpc_prices import mrpc_scan_query
+
+
+def query_plan(db, query) -> str:
+    compiled = query.compile(bind=db.get_bind(), compile_kwargs={"literal_binds": True})
+    rows = db.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+    return "\n".join(row[-1] for row in rows)
+
+
+def test_maintain_scan_reads_index_in_key_order(db):
+    for after in (None, (150.0, 10)):
+        plan = query_plan(db, mrpc_scan_query(1000, after=after))
+
+        assert "USING INDEX ix_sku_monitoring_active_available_mrpc" in plan
+        assert "active=? AND available=? AND mrpc>" in plan
+        assert "TEMP B-TREE" not in plan
+
+
+def test_update_prices_selection_uses_active_available_mrpc_index(db):
+    # Выборка /products/update-prices
+    query = select(SkuMonitoring).where(
+        and_(
+            SkuMonitoring.active == True,
+            SkuMonitoring.mrpc > 0,
+            SkuMonitoring.available == True
+        )
+    )
+
+    plan = query_plan(db, query)
+
+    assert "USING INDEX ix_sku_monitoring_active_available_mrpc (active=? AND available=? AND mrpc>?)" in plan
+
+
+def test_product_list_filters_use_indexes(db):
+    # Фильтры списка /products
+    by_active = select(SkuMonitoring.id).where(SkuMonitoring.active == True)
+    by_both = by_active.where(SkuMonitoring.available == True)
+    by_stock = select(SkuMonitoring.id).where(SkuMonitoring.available == True)
+
+    assert "USING COVERING INDEX ix_sku_monitoring_active_available_mrpc (active=?)" in query_plan(db, by_active)
+    assert "ix_sku_monitoring_active_available_mrpc (active=? AND available=?)" in query_plan(db, by_both)
+    assert "ix_sku_monitoring_available (available=?)" in query_plan(db, by_stock)
+
+
+def test_history_and_log_cursor_pages_use_timestamp_indexes(db):
+    for model, index in (
+        (PriceHistory, "ix_price_history_timestamp_id"),
+        (ApiLogEntry, "ix_api_log_entry_timestamp_id")
+    ):
+        key = (model.timestamp, model.id)
+        query = (
+            select(model)
+            .where(*seek_conditions(key, ["2026-01-01 12:00:00.000000", 10], descending=True))
+            .order_by(model.timestamp.desc(), model.id.desc())
+            .limit(51)
+        )
+
+        plan = query_plan(db, query)
+
+        assert f"USING INDEX {index} (timestamp<?)" in plan
+        assert "TEMP B-TREE" not in plan